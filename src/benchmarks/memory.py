@@ -0,0 +1,114 @@
+import argparse
+import os
+import tracemalloc
+
+from src.noobcash.transaction import Transaction
+from src.noobcash.utxo import UTXO, UTXOSet
+
+
+class LegacyUTXO:
+    """
+    The original dict-backed output, stored as an object per entry.
+    """
+
+    def __init__(self, transaction_id, index, owner, amount):
+        self.transaction_id = transaction_id
+        self.index = index
+        self.owner = owner
+        self.amount = amount
+
+
+class LegacyTransaction:
+    """
+    The original dict-backed transaction with its unused input and output fields.
+    """
+
+    def __init__(self, sender_address, receiver_address, amount, signature, nonce, transaction_id):
+        self.sender_address = sender_address
+        self.receiver_address = receiver_address
+        self.amount = amount
+        self.transaction_inputs = None
+        self.transaction_outputs = None
+        self.signature = signature
+        self.nonce = nonce
+        self.transaction_id = transaction_id
+
+
+def measure(build):
+    """
+    Measure the memory retained by the object graph returned by build().
+
+    :param build: Callable creating the structure to measure.
+    :return: The number of bytes allocated and still referenced.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    structure = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del structure
+    return after - before
+
+
+def build_legacy_utxos(count: int, owners: int):
+    """
+    Outputs keyed by (transaction ID, index) tuples with a per-owner index, as before the typed arrays.
+    """
+    outputs, index = {}, {}
+    for i in range(count):
+        utxo = LegacyUTXO(os.urandom(32), i & 1, i % owners, float(i))
+        outpoint = (utxo.transaction_id, utxo.index)
+        outputs[outpoint] = utxo
+        index.setdefault(utxo.owner, {})[outpoint] = None
+    return outputs, index
+
+
+def build_utxo_set(count: int, owners: int):
+    """
+    Outputs in the array-backed UTXOSet.
+    """
+    utxos = UTXOSet()
+    for i in range(count):
+        utxos.add(UTXO(os.urandom(32), i & 1, i % owners, float(i)))
+    return utxos
+
+
+def build_legacy_transactions(count: int):
+    """
+    Dict-backed transactions with the same field contents.
+    """
+    return [
+        LegacyTransaction(os.urandom(8).hex(), os.urandom(8).hex(), float(i), os.urandom(64), os.urandom(8), os.urandom(32))
+        for i in range(count)
+    ]
+
+
+def build_transactions(count: int):
+    """
+    Slotted transactions with a 64-byte signature.
+    """
+    transactions = []
+    for i in range(count):
+        tx = Transaction(os.urandom(8).hex(), None, os.urandom(8).hex(), float(i))
+        tx.signature = os.urandom(64)
+        transactions.append(tx)
+    return transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory footprint of UTXOs and transactions.")
+    parser.add_argument("--sizes", help="Number of entries to measure", default=[100000, 1000000], type=int, nargs="+")
+    parser.add_argument("--owners", help="Number of distinct owners of the outputs", default=100, type=int)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} | {'legacy B/UTXO':>13} | {'B/UTXO':>8} | {'legacy B/tx':>11} | {'B/tx':>6}")
+    for count in args.sizes:
+        legacy_utxo = measure(lambda: build_legacy_utxos(count, args.owners)) / count
+        utxo = measure(lambda: build_utxo_set(count, args.owners)) / count
+        legacy_tx = measure(lambda: build_legacy_transactions(count)) / count
+        tx = measure(lambda: build_transactions(count)) / count
+        print(f"{count:>10,} | {legacy_utxo:>13,.0f} | {utxo:>8,.0f} | {legacy_tx:>11,.0f} | {tx:>6,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import time
+
+from Crypto.Hash import SHA256
+
+from src.noobcash.block import Block, HEADER_NONCE
+from src.noobcash.blockchain import MAX_TARGET
+from src.noobcash.transaction import Transaction
+
+
+def legacy_hash(block: Block):
+    """
+    The original per-attempt hash: rebuilds the block dictionary and JSON-encodes it.
+
+    :param block: The block to hash.
+    :return: The hex digest.
+    """
+    block_object = {
+        'nonce': block.nonce,
+        'timestamp': block.timestamp,
+        'transactions': [tr.transaction_id for tr in block.transactions_list],
+        'previous_hash': block.previous_hash
+    }
+    block_dump = json.dumps(block_object.__str__())
+    return SHA256.new(block_dump.encode("ISO-8859-2")).hexdigest()
+
+
+def bench_legacy(block: Block, attempts: int):
+    """
+    Measure hashes/sec of the legacy dictionary + JSON hashing.
+    """
+    start = time.perf_counter()
+    for nonce in range(attempts):
+        block.nonce = nonce
+        legacy_hash(block)
+    return attempts / (time.perf_counter() - start)
+
+
+def bench_midstate(block: Block, attempts: int):
+    """
+    Measure hashes/sec of the binary header with a precomputed midstate (as done by the miner workers).
+    """
+    start = time.perf_counter()
+    midstate = block.midstate()
+    pack_nonce = HEADER_NONCE.pack
+    for nonce in range(attempts):
+        header = midstate.copy()
+        header.update(pack_nonce(nonce))
+        header.hexdigest()
+    return attempts / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Proof-of-Work hashing throughput.")
+    parser.add_argument("-n", "--attempts", help="Hash attempts per measurement", default=200000, type=int)
+    parser.add_argument("--sizes", help="Block sizes to measure", default=[1, 5, 10, 100], type=int, nargs="+")
+    args = parser.parse_args()
+
+    print(f"{'block size':>10} | {'legacy (H/s)':>14} | {'midstate (H/s)':>14} | {'speedup':>8}")
+    for size in args.sizes:
+        block = Block('00' * 32, MAX_TARGET)
+        block.transactions_list = [Transaction('0', None, '1', 1) for _ in range(size)]
+
+        legacy = bench_legacy(block, args.attempts // 10)
+        midstate = bench_midstate(block, args.attempts)
+        print(f"{size:>10} | {legacy:>14,.0f} | {midstate:>14,.0f} | {midstate / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import pickle
+import time
+
+from src.noobcash.ring import fingerprint
+from src.noobcash.signatures import SCHEMES
+from src.noobcash.transaction import Transaction
+
+
+def throughput(function, seconds: float):
+    """
+    Call a function repeatedly for the given time.
+
+    :return: The number of calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        function()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def bench_scheme(scheme, seconds: float):
+    """
+    Measure keygen, sign and verify throughput and the serialized sizes for one signature scheme.
+
+    :return: A dictionary with the results.
+    """
+    key = scheme.generate()
+    public_pem = scheme.export_public_key(key)
+    public_key = scheme.import_public_key(public_pem)
+
+    tx = Transaction(fingerprint(public_pem), key, fingerprint(public_pem), 10)
+    payload = tx.get_sign_payload()
+    tx.signature = scheme.sign(key, payload)
+
+    return {
+        'keygen': throughput(scheme.generate, seconds),
+        'sign': throughput(lambda: scheme.sign(key, payload), seconds),
+        'verify': throughput(lambda: scheme.verify(public_key, payload, tx.signature), seconds),
+        'signature': len(tx.signature),
+        'public_key': len(public_pem),
+        'transaction': len(pickle.dumps(tx))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the supported signature schemes.")
+    parser.add_argument("-s", "--seconds", help="Seconds per measurement", default=1.0, type=float)
+    args = parser.parse_args()
+
+    print(f"{'scheme':>8} | {'keygen/s':>9} | {'sign/s':>9} | {'verify/s':>9} | {'sig (B)':>7} | {'pubkey (B)':>10} | {'tx (B)':>6}")
+    for name, scheme in SCHEMES.items():
+        r = bench_scheme(scheme, args.seconds)
+        print(
+            f"{name:>8} | {r['keygen']:>9,.1f} | {r['sign']:>9,.0f} | {r['verify']:>9,.0f} | "
+            f"{r['signature']:>7} | {r['public_key']:>10} | {r['transaction']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import logging
+import pickle
+import threading
+import time
+
+import requests
+from flask import Flask, request
+from werkzeug.serving import make_server
+
+from src.noobcash.transport import PeerTransport, peer_url
+
+
+def start_server(port: int):
+    """
+    Start a threaded Flask server with a single endpoint that unpickles and discards a payload,
+    like /transactions/receive without the processing.
+
+    :return: The server, to be shut down by the caller.
+    """
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = Flask(__name__)
+
+    @app.route("/receive", methods=['POST'])
+    def receive():
+        pickle.loads(request.get_data())
+        return "OK", 200
+
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench(send, messages: int, payload: bytes):
+    """
+    Measure the time to send messages one after another.
+
+    :return: The elapsed seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(messages):
+        send(payload)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-message overhead of fresh vs pooled peer connections and batched messages.")
+    parser.add_argument("--messages", help="Messages per run", default=1000, type=int)
+    parser.add_argument("--size", help="Payload bytes", default=1024, type=int)
+    parser.add_argument("--batch", help="Messages per batch of the batched run", default=50, type=int)
+    parser.add_argument("--port", help="Port of the local test server", default=8999, type=int)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    peer = {'ip': '127.0.0.1', 'port': args.port}
+    message = pickle.dumps(b'\x00' * args.size)
+    batch = pickle.dumps([b'\x00' * args.size] * args.batch)
+    transport = PeerTransport()
+
+    fresh = bench(lambda data: requests.post(peer_url(peer, '/receive'), data=data, timeout=5), args.messages, message)
+    pooled = bench(lambda data: transport.post(peer, '/receive', data=data), args.messages, message)
+    stats = transport.metrics()[0]
+    batches = max(1, args.messages // args.batch)
+    batched = bench(lambda data: transport.post(peer, '/receive', data=data), batches, batch) * args.messages / (batches * args.batch)
+    transport.close()
+    server.shutdown()
+
+    print(f"{args.messages} messages x {args.size} bytes")
+    print(f"{'transport':>10} | {'total (s)':>9} | {'per msg (ms)':>12} | {'connections':>11}")
+    print(f"{'fresh':>10} | {fresh:>9.3f} | {1000 * fresh / args.messages:>12.3f} | {args.messages:>11}")
+    print(f"{'pooled':>10} | {pooled:>9.3f} | {1000 * pooled / args.messages:>12.3f} | {stats['connections_opened']:>11}")
+    print(f"{'batched':>10} | {batched:>9.3f} | {1000 * batched / args.messages:>12.3f} | {'-':>11}")
+
+
+if __name__ == "__main__":
+    main()
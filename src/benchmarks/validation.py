@@ -0,0 +1,83 @@
+import argparse
+import os
+import time
+
+from src.noobcash.block import Block
+from src.noobcash.blockchain import MAX_TARGET
+from src.noobcash.ring import Ring
+from src.noobcash.transaction import Transaction
+from src.noobcash.validation import ChainValidator
+from src.noobcash.verifier import SignatureVerifier
+from src.noobcash.wallet import Wallet
+
+
+def build_chain(wallets, blocks: int, size: int):
+    """
+    Build a linked chain of blocks filled with signed transactions between the wallets.
+    The target is the maximum, so the nonce 0 is always a valid proof-of-work.
+
+    :return: The list of blocks.
+    """
+    chain = []
+    previous_hash = '00' * 32
+    for height in range(blocks):
+        block = Block(previous_hash, MAX_TARGET)
+        for i in range(size):
+            sender = wallets[(height + i) % len(wallets)]
+            receiver = wallets[(height + i + 1) % len(wallets)]
+            tx = Transaction(sender.address, sender.private_key, receiver.address, 1)
+            tx.sign_transaction(sender.private_key)
+            block.transactions_list.append(tx)
+        block.nonce = 0
+        block.calculate_hash()
+        previous_hash = block.hash
+        chain.append(block)
+    return chain
+
+
+def bench(ring: Ring, chain, workers: int, checkpoints: dict):
+    """
+    Measure the time to validate the chain with a cold signature cache.
+
+    :return: The elapsed seconds.
+    """
+    verifier = SignatureVerifier(lambda: ring, workers, 0, 1)
+    validator = ChainValidator(verifier, checkpoints)
+    if workers > 1:
+        # Start the pool outside of the measurement
+        list(verifier.get_executor().map(abs, range(workers)))
+
+    start = time.perf_counter()
+    valid = validator.validate(0, chain)
+    elapsed = time.perf_counter() - start
+
+    if verifier.executor is not None:
+        verifier.executor.shutdown()
+    assert valid == len(chain)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel validation of a downloaded chain.")
+    parser.add_argument("--blocks", help="Number of blocks", default=200, type=int)
+    parser.add_argument("--size", help="Transactions per block", default=10, type=int)
+    parser.add_argument("--workers", help="Worker counts to measure", default=[1, 2, os.cpu_count() or 1], type=int, nargs="+")
+    args = parser.parse_args()
+
+    ring = Ring()
+    wallets = [Wallet() for _ in range(4)]
+    for i, wallet in enumerate(wallets):
+        ring.add(i, '127.0.0.1', 8000 + i, wallet.public_key_pem, 0)
+    chain = build_chain(wallets, args.blocks, args.size)
+    checkpoint = {len(chain) - 1: chain[-1].hash}
+
+    print(f"{args.blocks} blocks x {args.size} transactions")
+    print(f"{'workers':>7} | {'full (s)':>9} | {'blocks/s':>9} | {'checkpointed (s)':>16}")
+    for workers in sorted(set(args.workers)):
+        full = bench(ring, chain, workers, {})
+        checkpointed = bench(ring, chain, workers, checkpoint)
+        print(f"{workers:>7} | {full:>9.3f} | {args.blocks / full:>9,.0f} | {checkpointed:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
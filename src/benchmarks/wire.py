@@ -0,0 +1,73 @@
+import argparse
+import pickle
+import time
+
+from src.benchmarks.validation import build_chain
+from src.noobcash.blockchain import Blockchain
+from src.noobcash.ring import Ring
+from src.noobcash.utxo import UTXO
+from src.noobcash.wallet import Wallet
+from src.noobcash.wire import BLOCK, CHAIN, COMPACT_BLOCK, RING, TRANSACTION, decode, encode
+
+
+def measure(function, repeat: int):
+    """
+    Measure the average time of a call.
+
+    :return: The average microseconds per call.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return 1e6 * (time.perf_counter() - start) / repeat
+
+
+def build_blockchain(blocks):
+    """
+    Wrap benchmark blocks in a Blockchain with one created output per transaction as undo records.
+    """
+    blockchain = Blockchain()
+    for block in blocks:
+        created = [UTXO(tx.transaction_id, 0, 1, tx.amount) for tx in block.transactions_list]
+        blockchain.load_block(block, ([], created), replay=False)
+    return blockchain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the binary wire format against pickle.")
+    parser.add_argument("--size", help="Transactions per block", default=100, type=int)
+    parser.add_argument("--blocks", help="Blocks of the chain message", default=50, type=int)
+    parser.add_argument("--nodes", help="Members of the ring message", default=10, type=int)
+    parser.add_argument("--repeat", help="Repetitions per measurement", default=200, type=int)
+    args = parser.parse_args()
+
+    wallets = [Wallet() for _ in range(args.nodes)]
+    ring = Ring()
+    for i, wallet in enumerate(wallets):
+        ring.add(i, '127.0.0.1', str(8000 + i), wallet.public_key_pem, 100)
+    chain = build_chain(wallets, args.blocks, args.size)
+
+    messages = [
+        ("transaction", TRANSACTION, chain[0].transactions_list[0], args.repeat * 10),
+        (f"block ({args.size} txs)", BLOCK, chain[0], args.repeat),
+        (f"compact ({args.size} txs)", COMPACT_BLOCK, chain[0], args.repeat),
+        (f"ring ({args.nodes} nodes)", RING, ring, args.repeat),
+        (f"chain ({args.blocks} blocks)", CHAIN, build_blockchain(chain), max(1, args.repeat // 20))
+    ]
+
+    print(f"{'message':>20} | {'format':>6} | {'bytes':>9} | {'encode (us)':>11} | {'decode (us)':>11}")
+    for name, message_type, payload, repeat in messages:
+        pickled = pickle.dumps(payload)
+        encoded = encode(message_type, payload)
+        rows = [
+            ("pickle", len(pickled), measure(lambda: pickle.dumps(payload), repeat),
+             measure(lambda: pickle.loads(pickled), repeat)),
+            ("wire", len(encoded), measure(lambda: encode(message_type, payload), repeat),
+             measure(lambda: decode(encoded, message_type), repeat))
+        ]
+        for label, size, encode_time, decode_time in rows:
+            print(f"{name:>20} | {label:>6} | {size:>9,} | {encode_time:>11.1f} | {decode_time:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
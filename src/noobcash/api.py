@@ -1,18 +1,48 @@
 from flask import Flask, request, jsonify, make_response, Response, render_template
 from flask_cors import CORS
 from dotenv import load_dotenv
-from copy import deepcopy
 import os
 import argparse
-import pickle
 import time
 import threading
 
-from src.noobcash.node import Node
+from src.noobcash.blockchain import Blockchain
+from src.noobcash.gossip import TTL_HEADER
+from src.noobcash.node import Node, DATA_DIR
+from src.noobcash.sync import MAX_HEADERS
 from src.noobcash.transaction import Transaction
 from src.noobcash.utxo import UTXO
+from src.noobcash.wire import BLOCK, BLOCKS, CHAIN, COMPACT_BLOCK, RING, TRANSACTION, TRANSACTIONS, WireError, decode, encode
 from src.utils.logger import Logger
 
+PAGE_SIZE = 50         # Default number of transactions per history page
+MAX_PAGE_SIZE = 500    # Upper bound of the limit parameter
+
+
+def reject_message(error: WireError):
+    """
+    Build the response to a message that could not be decoded.
+
+    :param error: The decoding error.
+    :return: A 400 response.
+    """
+    Logger.error(f"Rejected message: {error}")
+    return make_response(jsonify({'message': str(error)}), 400)
+
+
+def parse_cursor(cursor):
+    """
+    Parse a pagination cursor of the form "<block height>:<position in block>".
+
+    :param cursor: The cursor string or None.
+    :return: A (height, position) tuple or None.
+    :raises ValueError: If the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    height, position = cursor.split(':')
+    return int(height), int(position)
+
 # Bootstrap Helper
 def check_full_ring(node: Node, total_nodes: int):
     """
@@ -23,6 +53,7 @@ def check_full_ring(node: Node, total_nodes: int):
     """
     time.sleep(1)
     if len(node.ring) == total_nodes:
+        node.save_state()
         node.broadcast_ring()
         node.broadcast_blockchain()
         node.broadcast_initial_nbc()
@@ -48,18 +79,97 @@ def create_genesis_block(node: Node, total_nbc: int):
     gen_block.transactions_list.append(first_transaction)
     gen_block.calculate_hash()
 
-    node.blockchain.chain.append(gen_block)
-    # Add first UTXO - keep existing indexing scheme
-    node.blockchain.UTXOs[0].append(UTXO(-1, node.id, total_nbc))
+    # Add first UTXO, owned by the bootstrap node
+    view = node.blockchain.UTXOs.overlay()
+    view.add(UTXO(first_transaction.transaction_id, 0, node.id, total_nbc))
+    node.blockchain.add_block(gen_block, view.commit())
 
     node.current_block = node.create_new_block()
 
-def init_node(args):
+def admit_transactions(node: Node, transactions, ttl=None, peer_id=None):
+    """
+    Admits a batch of transactions received from a peer and gossips the new ones on.
+
+    :param node: The node instance.
+    :param transactions: The received list of Transactions.
+    :param ttl: The gossip TTL the batch was received with.
+    :param peer_id: The ID of the node the batch was received from.
+    :return: The number of admitted transactions.
+    """
+    admitted = node.add_transactions_to_pending(transactions)
+    Logger.info(f"Batch of {len(transactions)} transactions received, {len(admitted)} admitted")
+
+    # Only transactions new to the pool are gossiped on
+    forward_ttl = node.gossip.forward_ttl(ttl)
+    if admitted and forward_ttl:
+        node.broadcast_transactions(admitted, forward_ttl, peer_id)
+    return len(admitted)
+
+def process_incoming_block(node: Node, block, ttl=None, peer_id=None):
+    """
+    Checks the hash and signatures of a block received from a peer and connects it to the block tree.
+    When gossiping, a valid block seen for the first time is forwarded with a decremented TTL.
+
+    :param node: The node instance.
+    :param block: The received Block.
+    :param ttl: The gossip TTL the block was received with.
+    :param peer_id: The ID of the node the block was received from.
+    """
+    if block.hash in node.gossip.seen:
+        return
+
+    if not block.has_valid_hash():
+        Logger.warning("Rejected incoming block: invalid hash")
+        return
+
+    # Signatures admitted to our pool before are served from the verifier cache
+    if not all(node.verifier.verify_batch(block.transactions_list)):
+        Logger.warning("Rejected incoming block: invalid transaction signature")
+        return
+
+    first = node.gossip.seen.add(block.hash)
+    with node.processing_block_lock:
+        node.receive_block(block)
+        Logger.info(f"Blockchain length: {len(node.blockchain.chain)}")
+
+    forward_ttl = node.gossip.forward_ttl(ttl)
+    if first and forward_ttl:
+        node.broadcast_block(block, forward_ttl, peer_id)
+
+def process_compact_block(node: Node, block, short_ids, peer, ttl=None):
+    """
+    Completes a compact block from the pending pool (downloading only the missing transactions) and processes it.
+
+    :param node: The node instance.
+    :param block: The announced Block, without transactions.
+    :param short_ids: The short IDs of its transactions.
+    :param peer: The ring entry of the announcing peer.
+    :param ttl: The gossip TTL the block was received with.
+    """
+    if block.hash in node.gossip.seen or node.blockchain.index.block_height(block.hash) is not None:
+        return
+    block = node.reconstruct_block(block, short_ids, peer)
+    if block is None:
+        Logger.warning("Rejected compact block: missing transactions could not be downloaded")
+        return
+    process_incoming_block(node, block, ttl, peer['id'])
+
+def catch_up(node: Node):
+    """
+    Fetches the blocks mined by the network while a restored node was offline.
+
+    :param node: The node instance.
+    """
+    with node.processing_block_lock:
+        node.blockchain.resolve_conflict(node)
+
+def init_node(args, transport=None):
     """
     Initialize Node object, environment and bootstrap logic.
     Returns (node, total_nodes, total_nbc, bootstrap_node, ip_address, port).
 
     :param args: Command line arguments.
+    :param transport: Replaces the PeerTransport of the node (e.g. an AsyncPeerTransport), None keeps it.
     :return: A tuple containing the initialized node, total nodes, total NBC, bootstrap node info, IP address, and port.
     """
 
@@ -68,6 +178,8 @@ def init_node(args):
 
     load_dotenv()
     node = Node(total_nodes)
+    if transport is not None:
+        node.transport = transport
 
     bootstrap_node = {
         'ip': os.getenv('API_IP'),
@@ -84,11 +196,17 @@ def init_node(args):
     if ip_address == bootstrap_node["ip"] and str(port) == bootstrap_node["port"]:
         node.is_bootstrap = True
 
+    # Restart from the data directory of a previous run
+    if DATA_DIR and node.open_store(os.path.join(DATA_DIR, f"node_{port}")):
+        Logger.success(f"Node {node.id} restored | Chain height: {len(node.blockchain.chain)}")
+        threading.Thread(target=catch_up, args=(node,), name="CatchUpThread").start()
+        return node, total_nodes, total_nbc, bootstrap_node, ip_address, port
+
     # Register node to the cluster
     if node.is_bootstrap:
         node.id = 0
         Logger.info("I am bootstrap")
-        node.add_node_to_ring(node.id, node.ip, node.port, node.wallet.address, total_nbc)
+        node.add_node_to_ring(node.id, node.ip, node.port, node.wallet.public_key_pem, total_nbc)
         create_genesis_block(node, total_nbc)
     else:
         node.unicast_node(bootstrap_node)
@@ -114,11 +232,15 @@ def create_app(node: Node, total_nodes: int, total_nbc: int):
         if receiver_id >= total_nodes:
             return make_response(jsonify({"message": 'Node ID does not exist'}), 400)
 
-        receiver_address = list(node.ring.keys())[receiver_id]
+        receiver_address = node.ring.by_id(receiver_id)['address']
         transaction = node.create_transaction(receiver_address, amount)
-        node.add_transaction_to_pending(transaction)
+        # Queued for the peers before the miner can pick it up, so a block never reaches them before it
         node.broadcast_transaction(transaction)
-        return make_response(jsonify({'message': 'Successful Transaction !'}), 200)
+        node.add_transaction_to_pending(transaction)
+        return make_response(jsonify({
+            'message': 'Successful Transaction !',
+            'transaction_id': transaction.transaction_id.hex()
+        }), 200)
 
     @app.route("/transactions/view", methods=['GET'])
     def get_transactions():
@@ -129,6 +251,7 @@ def create_app(node: Node, total_nodes: int, total_nbc: int):
         transactions = []
         for transaction in latest_block.transactions_list:
             transactions.append({
+                "transaction_id": transaction.transaction_id.hex(),
                 "sender_id": node.ring[transaction.sender_address]['id'],
                 "receiver_id": node.ring[transaction.receiver_address]['id'],
                 "amount": transaction.amount
@@ -136,6 +259,106 @@ def create_app(node: Node, total_nodes: int, total_nbc: int):
 
         return make_response(jsonify(transactions), 200)
 
+    def describe_transaction(height, position):
+        tx = node.blockchain.chain[height].transactions_list[position]
+        return {
+            "transaction_id": tx.transaction_id.hex(),
+            "sender_address": tx.sender_address,
+            "receiver_address": tx.receiver_address,
+            "sender_id": node.ring[tx.sender_address]['id'] if tx.sender_address in node.ring else None,
+            "receiver_id": node.ring[tx.receiver_address]['id'] if tx.receiver_address in node.ring else None,
+            "amount": tx.amount,
+            "block_height": height,
+            "position": position,
+            "block_hash": node.blockchain.chain[height].hash
+        }
+
+    def page_limit():
+        return max(1, min(request.args.get('limit', PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+    @app.route("/transactions/<tx_id>", methods=['GET'])
+    def get_transaction(tx_id: str):
+        try:
+            location = node.blockchain.find_transaction(bytes.fromhex(tx_id))
+        except ValueError:
+            return make_response(jsonify({"message": 'Invalid transaction ID'}), 400)
+
+        if location is None:
+            return make_response(jsonify({"message": 'Transaction not found in the chain'}), 404)
+        return make_response(jsonify(describe_transaction(*location)), 200)
+
+    @app.route("/addresses/<address>/transactions", methods=['GET'])
+    def get_address_transactions(address: str):
+        try:
+            cursor = parse_cursor(request.args.get('cursor'))
+        except ValueError:
+            return make_response(jsonify({"message": 'Invalid cursor'}), 400)
+
+        # Newest first; the cursor is the last transaction of the previous page
+        limit = page_limit()
+        locations = node.blockchain.index.address_history(address, cursor, limit)
+        return make_response(jsonify({
+            'transactions': [describe_transaction(*location) for location in locations],
+            'next_cursor': f"{locations[-1][0]}:{locations[-1][1]}" if len(locations) == limit else None
+        }), 200)
+
+    @app.route("/transactions", methods=['GET'])
+    def get_block_range_transactions():
+        chain = node.blockchain.chain
+        try:
+            start = max(0, request.args.get('from', 0, type=int))
+            # Half-open block range [from, to), like /blocks
+            end = min(request.args.get('to', len(chain), type=int), len(chain))
+            cursor = parse_cursor(request.args.get('cursor'))
+        except ValueError:
+            return make_response(jsonify({"message": 'Invalid cursor'}), 400)
+
+        # Oldest first; the cursor is the last transaction of the previous page
+        height, position = (start, 0) if cursor is None else (cursor[0], cursor[1] + 1)
+        limit = page_limit()
+        transactions = []
+        while height < end and len(transactions) < limit:
+            block_size = len(chain[height].transactions_list)
+            while position < block_size and len(transactions) < limit:
+                transactions.append(describe_transaction(height, position))
+                position += 1
+            if position >= block_size:
+                height, position = height + 1, 0
+
+        last = transactions[-1] if transactions else None
+        more = height < end
+        return make_response(jsonify({
+            'transactions': transactions,
+            'next_cursor': f"{last['block_height']}:{last['position']}" if last and more else None
+        }), 200)
+
+    @app.route("/transactions/<tx_id>/proof", methods=['GET'])
+    def get_transaction_proof(tx_id: str):
+        try:
+            transaction_id = bytes.fromhex(tx_id)
+        except ValueError:
+            return make_response(jsonify({"message": 'Invalid transaction ID'}), 400)
+
+        location = node.blockchain.find_transaction(transaction_id)
+        if location is None:
+            return make_response(jsonify({"message": 'Transaction not found in the chain'}), 404)
+
+        # The client hashes the header to get the block hash and checks the proof against its merkle root
+        height, index = location
+        block = node.blockchain.chain[height]
+        return make_response(jsonify({
+            'transaction_id': tx_id,
+            'block_height': height,
+            'block_hash': block.hash,
+            'header': block.serialize_header().hex(),
+            'merkle_root': block.compute_merkle_root().hex(),
+            'index': index,
+            'proof': [
+                {'hash': sibling.hex(), 'position': 'left' if is_left else 'right'}
+                for sibling, is_left in block.inclusion_proof(index)
+            ]
+        }), 200)
+
     @app.route("/balance", methods=['GET'])
     def get_balance():
         balance = node.ring[node.wallet.address]['balance']
@@ -144,11 +367,49 @@ def create_app(node: Node, total_nodes: int, total_nbc: int):
     @app.route("/blockchain/length", methods=['GET'])
     def get_blockchain_length():
         chain_len = len(node.blockchain.chain)
-        return make_response(jsonify({'chain_length': chain_len}), 200)
+        chain_work = node.blockchain.total_work()
+        return make_response(jsonify({'chain_length': chain_len, 'chain_work': format(chain_work, 'x')}), 200)
 
     @app.route("/blockchain", methods=['GET'])
     def get_blockchain():
-        return Response(pickle.dumps(node.blockchain), mimetype='application/octet-stream')
+        return Response(encode(CHAIN, node.blockchain), mimetype='application/octet-stream')
+
+    @app.route("/blocks/headers", methods=['GET'])
+    def get_headers():
+        try:
+            locator = [
+                (int(height), block_hash)
+                for height, block_hash in (entry.split(':') for entry in request.args.get('locator', '').split(',') if entry)
+            ]
+        except ValueError:
+            return make_response(jsonify({"message": 'Invalid locator'}), 400)
+
+        limit = max(1, min(request.args.get('limit', MAX_HEADERS, type=int), MAX_HEADERS))
+        chain = node.blockchain.chain
+        start = node.blockchain.locate(locator)
+        return make_response(jsonify({
+            'start': start,
+            'length': len(chain),
+            'headers': [
+                {'hash': block.hash, 'header': block.serialize_header().hex()}
+                for block in chain[start:start + limit]
+            ]
+        }), 200)
+
+    @app.route("/blocks", methods=['GET'])
+    def get_blocks():
+        chain = node.blockchain.chain
+        start = max(0, request.args.get('from', 0, type=int))
+        end = min(request.args.get('to', len(chain), type=int), start + MAX_HEADERS)
+        return Response(encode(BLOCKS, chain[start:end]), mimetype='application/octet-stream')
+
+    @app.route("/mining/stats", methods=['GET'])
+    def get_mining_stats():
+        return make_response(jsonify({'workers': node.miner.stats()}), 200)
+
+    @app.route("/network/stats", methods=['GET'])
+    def get_network_stats():
+        return make_response(jsonify({'peers': node.transport.metrics(), 'compact_blocks': node.compact_stats}), 200)
 
     @app.route("/node/info", methods=['GET'])
     def get_node_info():
@@ -166,66 +427,110 @@ def create_app(node: Node, total_nodes: int, total_nbc: int):
 
     @app.route("/ring/receive", methods=['POST'])
     def receive_ring():
-        data = request.data
-        node.ring = pickle.loads(data)
+        try:
+            node.ring = decode(request.get_data(), RING)
+        except WireError as e:
+            return reject_message(e)
+        node.save_state()
         Logger.success("Ring received successfully !")
         return make_response('OK', 200)
 
     @app.route("/blockchain/receive", methods=['POST'])
     def receive_blockchain():
-        data = request.data
-        node.blockchain = pickle.loads(data)
-        node.temp_utxos = deepcopy(node.blockchain.UTXOs)
+        try:
+            blocks, undo_logs = decode(request.get_data(), CHAIN)
+        except WireError as e:
+            return reject_message(e)
+        blockchain = Blockchain()
+        blockchain.load(blocks, undo_logs)
+        node.blockchain = blockchain
+        node.temp_utxos = node.blockchain.UTXOs.overlay()
+        node.save_state()
         Logger.success("Blockchain received successfully !")
         return make_response('OK', 200)
 
     @app.route("/transactions/receive", methods=['POST'])
     def receive_transaction():
-        data = request.data
-        new_transaction = pickle.loads(data)
+        try:
+            new_transaction = decode(request.get_data(), TRANSACTION)
+        except WireError as e:
+            return reject_message(e)
         Logger.info("New transaction received successfully !")
-        node.add_transaction_to_pending(new_transaction)
+        if not node.add_transaction_to_pending(new_transaction):
+            return make_response('Transaction rejected', 400)
         return make_response('OK', 200)
 
+    @app.route("/transactions/receive/batch", methods=['POST'])
+    def receive_transactions():
+        try:
+            transactions = decode(request.get_data(), TRANSACTIONS)
+        except WireError as e:
+            return reject_message(e)
+        admitted = admit_transactions(
+            node, transactions, request.headers.get(TTL_HEADER, type=int), request.args.get('peer', type=int)
+        )
+        return make_response(jsonify({'received': len(transactions), 'admitted': admitted}), 200)
+
     @app.route("/blocks/receive", methods=['POST'])
     def receive_block():
-        data = request.data
-        new_block = pickle.loads(data)
+        try:
+            new_block = decode(request.get_data(), BLOCK)
+        except WireError as e:
+            return reject_message(e)
         Logger.info("New block received successfully !")
 
-        def process_incoming_block(block):
-            with node.processing_block_lock:
-                if block.validate_block(node.blockchain):
-                    with node.incoming_block_lock:
-                        node.incoming_block = True
-                    Logger.info("Incoming valid block received")
-                    #Logger.mining("Block was mined by someone else")
-                    Logger.success("Adding it to the chain")
-                    node.add_block_to_chain(block)
-                    Logger.info(f"Blockchain length: {len(node.blockchain.chain)}")
-                elif node.blockchain.chain[-1].previous_hash == block.previous_hash:
-                    Logger.warning("Rejected incoming block")
-                else:
-                    Logger.warning(f"Incoming block previous_hash: {block.previous_hash}")
-                    Logger.info("BLOCKCHAIN")
-                    Logger.info(str([block.hash[:7] for block in node.blockchain.chain]))
-                    node.blockchain.resolve_conflict(node)
-                    Logger.error("Something went wrong with validation")
-
         # Process block in a separate thread to avoid timeouts on the sender side
-        t = threading.Thread(target=process_incoming_block, args=(new_block,))
+        t = threading.Thread(target=process_incoming_block, args=(
+            node, new_block, request.headers.get(TTL_HEADER, type=int), request.args.get('peer', type=int)
+        ))
+        t.start()
+
+        return make_response('OK', 200)
+
+    @app.route("/blocks/receive/compact", methods=['POST'])
+    def receive_compact_block():
+        try:
+            new_block, short_ids = decode(request.get_data(), COMPACT_BLOCK)
+        except WireError as e:
+            return reject_message(e)
+        peer = node.ring.by_id(request.args.get('peer', -1, type=int))
+        if peer is None:
+            return make_response(jsonify({"message": 'Unknown peer'}), 400)
+        Logger.info(f"Compact block received ({len(short_ids)} transactions)")
+
+        t = threading.Thread(target=process_compact_block, args=(
+            node, new_block, short_ids, peer, request.headers.get(TTL_HEADER, type=int)
+        ))
         t.start()
 
         return make_response('OK', 200)
 
+    @app.route("/blocks/<block_hash>/transactions", methods=['GET'])
+    def get_block_transactions(block_hash):
+        height = node.blockchain.index.block_height(block_hash)
+        if height is not None:
+            block = node.blockchain.chain[height]
+        elif block_hash in node.tree.side:
+            block = node.tree.side[block_hash][0]
+        elif block_hash in node.tree.orphans:
+            block = node.tree.orphans[block_hash]
+        else:
+            return make_response(jsonify({"message": 'Block not found'}), 404)
+        try:
+            indexes = [int(i) for i in request.args.get('indexes', '').split(',') if i]
+            transactions = [block.transactions_list[i] for i in indexes]
+        except (ValueError, IndexError):
+            return make_response(jsonify({"message": 'Invalid indexes'}), 400)
+        return Response(encode(TRANSACTIONS, transactions), mimetype='application/octet-stream')
+
     @app.route("/nodes/register", methods=['POST'])
     def register_node():
         ip = request.form.get('ip')
         port_form = request.form.get('port')
-        address = request.form.get('address')
+        public_key = request.form.get('public_key')
         id = len(node.ring)
 
-        node.add_node_to_ring(id, ip, port_form, address, 0)
+        node.add_node_to_ring(id, ip, port_form, public_key, 0)
 
         t = threading.Thread(
             target=check_full_ring,
@@ -0,0 +1,198 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from urllib.parse import parse_qs
+import argparse
+import asyncio
+import json
+import os
+import traceback
+
+import uvicorn
+from a2wsgi import WSGIMiddleware
+
+from src.noobcash.api import admit_transactions, create_app, init_node, process_compact_block, process_incoming_block
+from src.noobcash.async_transport import AsyncPeerTransport
+from src.noobcash.gossip import TTL_HEADER
+from src.noobcash.node import Node
+from src.noobcash.wire import BLOCK, COMPACT_BLOCK, TRANSACTION, TRANSACTIONS, WireError, decode
+from src.utils.logger import Logger
+
+load_dotenv()
+ASGI_WORKERS = int(os.getenv('ASGI_WORKERS', 8))  # Threads admitting transactions, and threads serving the Flask routes
+ASGI_BLOCK_WORKERS = int(os.getenv('ASGI_BLOCK_WORKERS', 2))  # Threads processing received blocks
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class NodeAsgiApp:
+
+    def __init__(self, node: Node, flask_app, workers: int = ASGI_WORKERS, block_workers: int = ASGI_BLOCK_WORKERS):
+        """
+        Initialize the ASGI application of a node.
+        The peer messages (/transactions/receive, /transactions/receive/batch, /blocks/receive and
+        /blocks/receive/compact) are async routes: their bodies are read and decoded on the event loop and the
+        node work runs on thread pools, so thousands of concurrent messages wait as coroutines instead of
+        holding a thread each. Every other endpoint is passed to the Flask app of create_app() through
+        a2wsgi, so the REST surface is unchanged. Blocks have their own pool: a burst of blocks waiting for
+        processing_block_lock cannot starve the Flask routes (/blocks/headers, /blocks) that peers need to
+        resolve them.
+
+        :param node: The node instance.
+        :param flask_app: The Flask app serving all other routes.
+        :param workers: The number of threads admitting transactions, and of threads serving Flask routes.
+        :param block_workers: The number of threads processing received blocks.
+        """
+        self.node = node
+        self.wsgi = WSGIMiddleware(flask_app, workers=workers)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="AsgiWorker")
+        self.block_executor = ThreadPoolExecutor(block_workers, thread_name_prefix="BlockWorker")
+        self.routes = {
+            ('POST', '/transactions/receive'): self.receive_transaction,
+            ('POST', '/transactions/receive/batch'): self.receive_transactions,
+            ('POST', '/blocks/receive'): self.receive_block,
+            ('POST', '/blocks/receive/compact'): self.receive_compact_block
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        route = self.routes.get((scope['method'], scope['path'])) if scope['type'] == 'http' else None
+        if route is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        body = await self.read_body(receive)
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        status, content_type, content = await route(body, query, headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(content)).encode()),
+            (b'access-control-allow-origin', b'*')
+        ]})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                self.block_executor.shutdown(wait=False)
+                self.wsgi.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def run(self, function, *args):
+        """
+        Run blocking node work on the worker threads.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def process_block(self, function, *args):
+        """
+        Process a received block on the block workers; failures are logged with their traceback.
+        """
+        self.block_executor.submit(function, *args).add_done_callback(self.log_failure)
+
+    @staticmethod
+    def log_failure(future):
+        error = future.exception()
+        if error is not None:
+            Logger.error(f"Block processing failed:\n{''.join(traceback.format_exception(error))}")
+
+    # --- Async routes ---
+
+    @staticmethod
+    def text(status, message):
+        return status, 'text/html; charset=utf-8', message.encode()
+
+    @staticmethod
+    def json(status, payload):
+        return status, 'application/json', json.dumps(payload).encode() + b'\n'
+
+    def reject(self, error: WireError):
+        Logger.error(f"Rejected message: {error}")
+        return self.json(400, {'message': str(error)})
+
+    async def receive_transaction(self, body, query, headers):
+        try:
+            new_transaction = decode(body, TRANSACTION)
+        except WireError as e:
+            return self.reject(e)
+        Logger.info("New transaction received successfully !")
+        if not await self.run(self.node.add_transaction_to_pending, new_transaction):
+            return self.text(400, 'Transaction rejected')
+        return self.text(200, 'OK')
+
+    async def receive_transactions(self, body, query, headers):
+        try:
+            transactions = decode(body, TRANSACTIONS)
+        except WireError as e:
+            return self.reject(e)
+        admitted = await self.run(admit_transactions, self.node, transactions,
+                                  _int(headers.get(TTL_HEADER.lower())), _int(query.get('peer', [None])[0]))
+        return self.json(200, {'admitted': admitted, 'received': len(transactions)})
+
+    async def receive_block(self, body, query, headers):
+        try:
+            new_block = decode(body, BLOCK)
+        except WireError as e:
+            return self.reject(e)
+        Logger.info("New block received successfully !")
+
+        # Answered at once, the block is processed by a block worker
+        self.process_block(process_incoming_block, self.node, new_block,
+                           _int(headers.get(TTL_HEADER.lower())), _int(query.get('peer', [None])[0]))
+        return self.text(200, 'OK')
+
+    async def receive_compact_block(self, body, query, headers):
+        try:
+            new_block, short_ids = decode(body, COMPACT_BLOCK)
+        except WireError as e:
+            return self.reject(e)
+        peer_id = _int(query.get('peer', [None])[0])
+        peer = self.node.ring.by_id(-1 if peer_id is None else peer_id)
+        if peer is None:
+            return self.json(400, {'message': 'Unknown peer'})
+        Logger.info(f"Compact block received ({len(short_ids)} transactions)")
+
+        self.process_block(process_compact_block, self.node, new_block, short_ids, peer,
+                           _int(headers.get(TTL_HEADER.lower())))
+        return self.text(200, 'OK')
+
+# Entrypoint
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", "--port", help="Port in which node is running", default=8000, type=int)
+    parser.add_argument("--ip", help="IP of the host", default="127.0.0.1")
+    parser.add_argument("--total_nodes", help="Total number of nodes in the network", default=5, type=int)
+    parser.add_argument("--workers", help="Threads admitting transactions and serving Flask routes", default=ASGI_WORKERS, type=int)
+
+    args = parser.parse_args()
+
+    node, total_nodes, total_nbc, bootstrap_node, ip_address, port = init_node(args, AsyncPeerTransport())
+    app = NodeAsgiApp(node, create_app(node, total_nodes, total_nbc), args.workers)
+
+    # A single process: uvicorn worker processes would each run a separate node with its own state
+    uvicorn.run(app, host=ip_address, port=port, workers=1, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
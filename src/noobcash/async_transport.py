@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import requests
+
+from src.noobcash.transport import (OUTBOUND_QUEUE_SIZE, PEER_CONNECT_TIMEOUT, PEER_POOL_SIZE, PEER_READ_TIMEOUT,
+                                    peer_url)
+from src.utils.logger import Logger
+
+
+class AsyncPeerTransport:
+
+    def __init__(self, pool_size: int = PEER_POOL_SIZE, connect_timeout: float = PEER_CONNECT_TIMEOUT,
+                 read_timeout: float = PEER_READ_TIMEOUT):
+        """
+        Initialize the asyncio counterpart of PeerTransport, used by nodes served with asgi.py.
+        All peer traffic runs on one event loop in a background thread ("PeerIO"), with an httpx.AsyncClient
+        per peer holding its keep-alive connections: outbound queues are drained by a task per peer instead
+        of a thread per peer, so broadcasting to many peers costs no threads. The interface (request, get,
+        post, send, metrics, close) is that of PeerTransport and the responses offer the same status_code,
+        content, text and json(), so the node and sync.py use either one unchanged; blocking calls wait on
+        the loop from the calling thread.
+
+        :param pool_size: The maximum number of idle connections kept open per peer.
+        :param connect_timeout: Seconds to wait for a connection to a peer.
+        :param read_timeout: Seconds to wait for the response of a peer.
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.clients = {}   # {(ip, port): httpx.AsyncClient}, only used on the loop
+        self.stats = {}     # {(ip, port): {'requests', 'errors', 'seconds', 'connections', 'sent', 'dropped', 'queued_seconds'}}
+        self.outboxes = {}  # {(ip, port): asyncio.Queue of (peer, path, data, description, headers, enqueue time)}
+        self.deliveries = {}  # {(ip, port): delivery Task}
+        self.lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="PeerIO", daemon=True)
+        self.thread.start()
+
+    def _key(self, peer):
+        key = (peer['ip'], int(peer['port']))
+        with self.lock:
+            if key not in self.stats:
+                self.stats[key] = {'requests': 0, 'errors': 0, 'seconds': 0.0, 'connections': 0,
+                                   'sent': 0, 'dropped': 0, 'queued_seconds': 0.0}
+        return key
+
+    def _client(self, key):
+        client = self.clients.get(key)
+        if client is None:
+            # Retries only cover failed connection attempts, a request that may have been received is never resent
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size), retries=1
+            )
+            client = self.clients[key] = httpx.AsyncClient(transport=transport, trust_env=False)
+        return client
+
+    async def arequest(self, method: str, peer, path: str, timeout=None, data=None, params=None, headers=None):
+        """
+        Send a request to a peer over its pooled connections, on the event loop.
+
+        :param method: The HTTP method.
+        :param peer: The ring entry of the peer.
+        :param path: The endpoint path, e.g. '/blocks/receive'.
+        :param timeout: Overrides the default (connect, read) timeout.
+        :param data: The request body, bytes or a dict sent as a form.
+        :param params: Query parameters.
+        :param headers: Optional request headers.
+        :return: The httpx.Response. Raises requests.exceptions.RequestException on network errors,
+                 like PeerTransport.
+        """
+        key = self._key(peer)
+        connect_timeout, read_timeout = timeout or self.timeout
+        body = {'data': data} if isinstance(data, dict) else {'content': data}
+
+        async def trace(event, info):
+            if event == 'connection.connect_tcp.complete':
+                with self.lock:
+                    self.stats[key]['connections'] += 1
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await self._client(key).request(
+                method, peer_url(peer, path), params=params, headers=headers, **body,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout), extensions={'trace': trace}
+            )
+        except httpx.TimeoutException as e:
+            failed = True
+            raise requests.exceptions.Timeout(f"{method} {path} to Node {peer.get('id', '?')} timed out: {e}") from e
+        except httpx.HTTPError as e:
+            failed = True
+            raise requests.exceptions.ConnectionError(f"{method} {path} to Node {peer.get('id', '?')} failed: {e}") from e
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                stats = self.stats[key]
+                stats['requests'] += 1
+                stats['errors'] += failed
+                stats['seconds'] += elapsed
+
+    def request(self, method: str, peer, path: str, timeout=None, **kwargs):
+        """
+        Send a request to a peer and wait for the response. Must not be called from the PeerIO loop itself.
+
+        :param kwargs: data, params or headers, see arequest().
+        :return: The httpx.Response. Raises requests.exceptions.RequestException on network errors.
+        """
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("Blocking peer request on the PeerIO event loop, use arequest()")
+        return asyncio.run_coroutine_threadsafe(self.arequest(method, peer, path, timeout, **kwargs), self.loop).result()
+
+    def get(self, peer, path: str, **kwargs):
+        return self.request('GET', peer, path, **kwargs)
+
+    def post(self, peer, path: str, **kwargs):
+        return self.request('POST', peer, path, **kwargs)
+
+    def send(self, peer, path: str, data: bytes, description: str = 'message', headers=None):
+        """
+        Queue a POST to a peer and return immediately, from any thread. The message is sent by the delivery
+        task of the peer. If OUTBOUND_QUEUE_SIZE messages are already waiting, the message is dropped.
+
+        :param peer: The ring entry of the peer.
+        :param path: The endpoint path.
+        :param data: The request body.
+        :param description: What is sent, for error messages.
+        :param headers: Optional request headers.
+        """
+        key = self._key(peer)
+        self.loop.call_soon_threadsafe(self._enqueue, key, (peer, path, data, description, headers, time.perf_counter()))
+
+    def _enqueue(self, key, item):
+        outbox = self.outboxes.get(key)
+        if outbox is None:
+            outbox = self.outboxes[key] = asyncio.Queue(OUTBOUND_QUEUE_SIZE)
+            self.deliveries[key] = self.loop.create_task(self._deliver(key, outbox))
+        try:
+            outbox.put_nowait(item)
+        except asyncio.QueueFull:
+            Logger.error(f"Outbound queue of Node {item[0].get('id', '?')} is full, dropping {item[3]}")
+            with self.lock:
+                self.stats[key]['dropped'] += 1
+
+    async def _deliver(self, key, outbox):
+        """
+        Delivery task of a peer: sends its queued messages in order.
+        """
+        while True:
+            item = await outbox.get()
+            if item is None:
+                return
+            peer, path, data, description, headers, queued = item
+            waited = time.perf_counter() - queued
+            try:
+                await self.arequest('POST', peer, path, data=data, headers=headers)
+            except requests.exceptions.RequestException:
+                Logger.error(f"Network Error: Could not send {description} to Node {peer.get('id', '?')}")
+            with self.lock:
+                stats = self.stats[key]
+                stats['sent'] += 1
+                stats['queued_seconds'] += waited
+
+    def metrics(self):
+        """
+        Returns the connection reuse and outbound queue statistics of every peer, like PeerTransport.metrics().
+
+        :return: A list of dictionaries, one per peer.
+        """
+        with self.lock:
+            entries = [(key, dict(stats), self.outboxes.get(key)) for key, stats in self.stats.items()]
+
+        metrics = []
+        for (ip, port), stats, outbox in entries:
+            reused = max(0, stats['requests'] - stats['errors'] - stats['connections'])
+            metrics.append({
+                'peer': f"{ip}:{port}",
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'connections_opened': stats['connections'],
+                'connections_reused': reused,
+                'reuse_ratio': round(reused / stats['requests'], 3) if stats['requests'] else 0.0,
+                'avg_latency_ms': round(1000 * stats['seconds'] / stats['requests'], 3) if stats['requests'] else 0.0,
+                'queue_depth': outbox.qsize() if outbox is not None else 0,
+                'queued_sent': stats['sent'],
+                'queued_dropped': stats['dropped'],
+                'avg_queue_wait_ms': round(1000 * stats['queued_seconds'] / stats['sent'], 3) if stats['sent'] else 0.0
+            })
+        return metrics
+
+    async def _close(self):
+        outboxes, self.outboxes = self.outboxes, {}
+        deliveries, self.deliveries = self.deliveries, {}
+        for outbox in outboxes.values():
+            await outbox.put(None)
+        await asyncio.gather(*deliveries.values())
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def close(self):
+        """
+        Stop the delivery tasks once their queues are drained and close all pooled connections.
+        """
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result()
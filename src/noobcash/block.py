@@ -1,60 +1,151 @@
-import json
 from dotenv import load_dotenv
+import hashlib
 import os
+import struct
 
 from time import time
-from Crypto.Hash import SHA256
 
-from src.noobcash.blockchain import Blockchain
+from src.noobcash.merkle import merkle_proof, merkle_root
 from src.utils.logger import Logger
 
 load_dotenv()
 block_size = int(os.getenv('BLOCK_SIZE'))
 mining_difficulty = int(os.getenv('MINING_DIFFICULTY'))
 
+HEADER_VERSION = 1
+# Fixed-layout header: version, previous hash, merkle root, target, timestamp | nonce
+HEADER_PREFIX = struct.Struct('<I32s32s32sd')
+HEADER_NONCE = struct.Struct('<I')
+
 class Block:
-    def __init__(self, previous_hash):
+    __slots__ = ('previous_hash', 'target', 'timestamp', 'hash', 'nonce', 'merkle_root', 'transactions_list')
+
+    def __init__(self, previous_hash, target):
         """
         Initialize a block.
 
         :param previous_hash: The hash of the previous block in the blockchain.
+        :param target: The 256-bit proof-of-work target the block hash must not exceed.
         """
         self.previous_hash = previous_hash
+        self.target = target
         self.timestamp = time()
         self.hash = None
         self.nonce = None
+        self.merkle_root = None
         self.transactions_list = []
 	
+    def compute_merkle_root(self):
+        """
+        Compute the merkle root committing to the ordered transaction IDs of the block and store it.
+
+        :return: The 32-byte merkle root.
+        """
+        self.merkle_root = merkle_root([tr.transaction_id for tr in self.transactions_list])
+        return self.merkle_root
+
+    def inclusion_proof(self, index: int):
+        """
+        Build the merkle inclusion proof of the transaction at the given position.
+
+        :param index: The position of the transaction in the block.
+        :return: A list of (sibling hash, sibling is left) tuples.
+        """
+        return merkle_proof([tr.transaction_id for tr in self.transactions_list], index)
+
+    def header_prefix(self):
+        """
+        Serialize the constant part of the block header (everything except the nonce).
+        The merkle root is recomputed from the transactions, so it is computed once per block template when mining.
+        The genesis block's previous_hash (1) is encoded as a 32-byte integer.
+
+        :return: The packed header prefix bytes.
+        """
+        if isinstance(self.previous_hash, str):
+            previous_hash = bytes.fromhex(self.previous_hash)
+        else:
+            previous_hash = self.previous_hash.to_bytes(32, 'big')
+
+        return HEADER_PREFIX.pack(
+            HEADER_VERSION,
+            previous_hash,
+            self.compute_merkle_root(),
+            self.target.to_bytes(32, 'big'),
+            self.timestamp
+        )
+
+    def midstate(self):
+        """
+        Return a SHA256 object that has already absorbed the header prefix.
+        Miners copy it for every attempt so only the nonce bytes are hashed per nonce.
+
+        :return: A hashlib SHA256 object.
+        """
+        return hashlib.sha256(self.header_prefix())
+
+    def serialize_header(self):
+        """
+        Serialize the full block header, whose SHA256 is the block hash.
+
+        :return: The header bytes.
+        """
+        return self.header_prefix() + HEADER_NONCE.pack(self.nonce)
+
     def calculate_hash(self):
         """
         Return hash of the block.
 
-        :return: The calculated SHA256 hash of the block.
+        :return: The calculated SHA256 hash of the block header.
         """
-        block_object = {
-            'nonce': self.nonce,
-            'timestamp': self.timestamp, 
-            'transactions': [tr.transaction_id for tr in self.transactions_list],
-            'previous_hash': self.previous_hash
-        }
-        
-        block_dump = json.dumps(block_object.__str__())
-        self.hash = SHA256.new(block_dump.encode("ISO-8859-2")).hexdigest()
-        
+        header = self.midstate()
+        header.update(HEADER_NONCE.pack(self.nonce))
+        self.hash = header.hexdigest()
+
         return self.hash
-    
-    def validate_block(self, blockchain: Blockchain):
+
+    def meets_target(self):
+        """
+        Check the proof-of-work: the block hash, read as a 256-bit integer, must not exceed the target.
+
+        :return: True if the hash satisfies the target, False otherwise.
+        """
+        return int(self.hash, 16) <= self.target
+
+    def has_valid_hash(self):
+        """
+        Recompute the block hash from the header and check it against the stored hash and the target,
+        so the stored hash (and with it the proof-of-work and the merkle root) cannot be forged.
+
+        :return: True if the stored hash is the hash of the header and meets the target, False otherwise.
+        """
+        digest = hashlib.sha256(self.serialize_header()).digest()
+        return digest.hex() == self.hash and int.from_bytes(digest, 'big') <= self.target
+
+    def has_new_transactions(self, blockchain):
+        """
+        Check that no transaction appears twice in the block or is already confirmed in the chain.
+
+        :param blockchain: The blockchain the block extends.
+        :return: True if all transaction IDs are new, False otherwise.
+        """
+        ids = {tx.transaction_id for tx in self.transactions_list}
+        return len(ids) == len(self.transactions_list) and blockchain.transactions_set.isdisjoint(ids)
+
+    def validate_block(self, blockchain):
         """
         Validate current_hash and previous_hash.
         Called from a node when it receives a broadcasted block (that isn't the genesis block).
-        Checks 1) if current_hash is correct
-               2) if the previous_hash field is equal to the the hash of the actual previous block
+        Checks 1) if the previous_hash field is equal to the the hash of the actual previous block
+               2) if the number of transactions is within the block size limits
+               3) if no transaction is repeated or already in the chain
+               4) if the target is the one expected by the blockchain at this height
+               5) if current_hash satisfies the target
 
         :param blockchain: The blockchain instance to validate against.
         :return: True if the block is valid, False otherwise.
         """
-        # Special case: If it is the genesis block, it's valid 
-        if self.previous_hash == 1 and self.nonce == 0:
+        # Special case: If it is the genesis block of an empty chain, it's valid
+        if self.previous_hash == 1 and self.nonce == 0 and not blockchain.chain:
             return True
         
         # Get last block of the chain and check its hash
@@ -65,8 +156,23 @@ class Block:
             Logger.error("Error in block validation: Not correct previous_hash")
             return False
 
-        # 2) Check if current_hash is correct
-        if self.hash.startswith('0' * blockchain.difficulty):
+        # 2) Check if the block size is within the limits
+        if not blockchain.minBlockTransactions <= len(self.transactions_list) <= blockchain.maxBlockTransactions:
+            Logger.error("Error in block validation: Not allowed number of transactions")
+            return False
+
+        # 3) Check if the transactions are new
+        if not self.has_new_transactions(blockchain):
+            Logger.error("Error in block validation: Repeated transaction")
+            return False
+
+        # 4) Check if the block uses the target expected at this height
+        if self.target != blockchain.next_target():
+            Logger.error("Error in block validation: Not correct target")
+            return False
+
+        # 5) Check if current_hash is correct
+        if self.meets_target():
             Logger.success('Block validated !')
             return True
         else:
@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+
+def block_work(target: int):
+    """
+    Expected number of hashes needed to find a block for a target.
+
+    :param target: The 256-bit proof-of-work target.
+    :return: The work of the block.
+    """
+    return 2 ** 256 // (target + 1)
+
+
+class BlockTree:
+
+    def __init__(self, max_depth: int, max_orphans: int):
+        """
+        Initialize the blocks known besides the main chain.
+        Side blocks extend the main chain or another side block and are kept with their height and
+        cumulative work, so a competing branch can be adopted as soon as it has more work than the tip.
+        Orphans are blocks whose parent is unknown; they wait until their parent arrives.
+
+        :param max_depth: Side blocks more than max_depth below the tip are pruned.
+        :param max_orphans: The maximum number of buffered orphans, the oldest are evicted first.
+        """
+        self.max_depth = max_depth
+        self.max_orphans = max_orphans
+        self.side = {}                  # {block hash: (block, height, cumulative work)}
+        self.orphans = OrderedDict()    # {block hash: block}, oldest first
+        self.children = {}              # {parent hash: [orphan hashes]}
+
+    def add_side(self, block, height: int, work: int):
+        """
+        Store a block of a side branch.
+
+        :param block: The Block.
+        :param height: Its height.
+        :param work: The cumulative work of the branch up to and including the block.
+        """
+        self.side[block.hash] = (block, height, work)
+
+    def remove_side(self, blocks):
+        """
+        Forget side blocks (after they became part of the main chain or turned out invalid).
+
+        :param blocks: The blocks to remove.
+        """
+        for block in blocks:
+            self.side.pop(block.hash, None)
+
+    def branch(self, block_hash):
+        """
+        Walk back from a side block to the main chain.
+
+        :param block_hash: The hash of the side block at the tip of the branch.
+        :return: A (hash of the main chain block the branch forks from, side blocks oldest first) tuple.
+        """
+        branch = []
+        while block_hash in self.side:
+            block = self.side[block_hash][0]
+            branch.append(block)
+            block_hash = block.previous_hash
+        branch.reverse()
+        return block_hash, branch
+
+    def prune(self, tip_height: int):
+        """
+        Drop side blocks too deep below the tip to be adopted.
+
+        :param tip_height: The height of the main chain tip.
+        """
+        for block_hash in [h for h, (_, height, _) in self.side.items() if height < tip_height - self.max_depth]:
+            del self.side[block_hash]
+
+    def add_orphan(self, block):
+        """
+        Buffer a block whose parent is unknown, evicting the oldest orphan if the pool is full.
+
+        :param block: The orphan Block.
+        """
+        if block.hash in self.orphans:
+            return
+        self.orphans[block.hash] = block
+        self.children.setdefault(block.previous_hash, []).append(block.hash)
+        while len(self.orphans) > self.max_orphans:
+            _, evicted = self.orphans.popitem(last=False)
+            self._unlink(evicted)
+
+    def pop_children(self, parent_hash):
+        """
+        Remove and return the orphans waiting for a parent.
+
+        :param parent_hash: The hash of the block that arrived.
+        :return: The list of orphan blocks whose parent it is.
+        """
+        return [self.orphans.pop(h) for h in self.children.pop(parent_hash, []) if h in self.orphans]
+
+    def _unlink(self, block):
+        siblings = self.children.get(block.previous_hash, [])
+        if block.hash in siblings:
+            siblings.remove(block.hash)
+        if not siblings:
+            self.children.pop(block.previous_hash, None)
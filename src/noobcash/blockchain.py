@@ -1,13 +1,43 @@
 from dotenv import load_dotenv
-import requests
-import pickle
+import math
 import os
+from src.noobcash.block_tree import block_work
+from src.noobcash.chain_index import ChainIndex
+from src.noobcash.sync import fetch_blocks, fetch_headers, fetch_lengths
+from src.noobcash.utxo import UTXOSet
 from src.utils.logger import Logger
-from copy import deepcopy
 
 load_dotenv()
 BLOCK_SIZE = int(os.getenv('BLOCK_SIZE'))
+MIN_BLOCK_SIZE = int(os.getenv('MIN_BLOCK_SIZE', 1))
+MAX_BLOCK_SIZE = int(os.getenv('MAX_BLOCK_SIZE', BLOCK_SIZE))
 MINING_DIFFICULTY = int(os.getenv('MINING_DIFFICULTY'))
+MINING_DIFFICULTY_BITS = float(os.getenv('MINING_DIFFICULTY_BITS', 4 * MINING_DIFFICULTY))
+TARGET_BLOCK_TIME = float(os.getenv('TARGET_BLOCK_TIME', 0))  # Seconds, 0 disables retargeting
+RETARGET_INTERVAL = int(os.getenv('RETARGET_INTERVAL', 10))  # Blocks between two retargets
+MAX_TARGET = 2 ** 256 - 1
+
+
+def bits_to_target(bits: float):
+    """
+    Convert a difficulty in (possibly fractional) leading zero bits to a 256-bit target.
+    A block hash is valid if its integer value is lower than or equal to the target.
+
+    :param bits: The number of leading zero bits required.
+    :return: The integer target.
+    """
+    return min(int(2 ** (256 - bits)) - 1, MAX_TARGET)
+
+
+def target_to_bits(target: int):
+    """
+    Convert a 256-bit target back to its difficulty in leading zero bits (for logging).
+
+    :param target: The integer target.
+    :return: The difficulty in bits.
+    """
+    return 256 - math.log2(target + 1)
+
 
 class Blockchain:
     def __init__(self):
@@ -15,10 +45,118 @@ class Blockchain:
         Initialize a Blockchain instance.
         """
         self.chain = []  # List of Block objects representing the blockchain ledger
-        self.difficulty = MINING_DIFFICULTY  # Mining difficulty level for proof-of-work
-        self.maxBlockTransactions = BLOCK_SIZE  # Maximum transactions per block
-        self.UTXOs = []  # List of UTXO lists, indexed by client_id
+        self.initial_target = bits_to_target(MINING_DIFFICULTY_BITS)  # Proof-of-work target of the genesis block
+        self.minBlockTransactions = MIN_BLOCK_SIZE  # Minimum transactions per block
+        self.maxBlockTransactions = MAX_BLOCK_SIZE  # Maximum transactions per block
+        self.UTXOs = UTXOSet()  # Index of unspent outputs with per-owner balances
         self.transactions_set = set()  # Set of transaction IDs to prevent duplicates
+        self.index = ChainIndex()  # Transaction locations and per-address history
+        self.undo_logs = []  # Per block (spent UTXOs, created UTXOs), aligned with the chain
+        self.chain_work = []  # Cumulative proof-of-work up to every block, aligned with the chain
+        self.store = None  # Optional BlockStore persisting the chain, local to the node
+
+    def attach_store(self, store):
+        """
+        Persist the chain to a block store from now on. The store is rewritten with the current chain.
+
+        :param store: The BlockStore of the node.
+        """
+        self.store = store
+        store.truncate(0)
+        for block, undo in zip(self.chain, self.undo_logs):
+            store.append(block, undo)
+
+    def restore(self, store):
+        """
+        Load the chain from a block store. The UTXO set is loaded from the latest snapshot
+        and only the blocks after it are replayed.
+
+        :param store: The BlockStore of the node.
+        """
+        snapshot = store.load_snapshot()
+        replay_from = 0
+        if snapshot is not None:
+            replay_from, self.UTXOs = snapshot
+
+        for height in range(store.height):
+            self.load_block(*store.read(height), replay=height >= replay_from)
+
+        self.store = store
+        Logger.info(f"Chain restored | Height: {len(self.chain)} | Replayed: {len(self.chain) - replay_from} blocks")
+
+    def load(self, blocks, undo_logs):
+        """
+        Rebuild an empty blockchain from trusted blocks and their undo records (e.g. received from the bootstrap).
+
+        :param blocks: The blocks, oldest first.
+        :param undo_logs: The undo record of every block.
+        """
+        for block, undo in zip(blocks, undo_logs):
+            self.load_block(block, undo, replay=True)
+
+    def load_block(self, block, undo, replay: bool):
+        """
+        Append a stored block without validating it.
+
+        :param block: The Block.
+        :param undo: Its undo record.
+        :param replay: Whether the UTXO changes of the block are applied.
+        """
+        self.index.add_block(len(self.chain), block)
+        self.chain.append(block)
+        self.undo_logs.append(undo)
+        self.transactions_set.update(tx.transaction_id for tx in block.transactions_list)
+        self.chain_work.append(self.total_work() + block_work(block.target))
+        if replay:
+            self.UTXOs.reapply(undo)
+
+    def add_block(self, block, undo):
+        """
+        Append a block whose transactions were applied to the UTXO set.
+
+        :param block: The Block to append.
+        :param undo: The undo record returned when the block's UTXO view was committed.
+        """
+        self.chain_work.append(self.total_work() + block_work(block.target))
+        self.chain.append(block)
+        self.undo_logs.append(undo)
+        self.transactions_set.update(tx.transaction_id for tx in block.transactions_list)
+        self.index.add_block(len(self.chain) - 1, block)
+
+        if self.store is not None:
+            self.store.append(block, undo)
+            if self.store.snapshot_interval and len(self.chain) % self.store.snapshot_interval == 0:
+                self.store.save_snapshot(len(self.chain), self.UTXOs)
+
+    def total_work(self):
+        """
+        Returns the cumulative proof-of-work of the chain, used to choose between competing chains.
+
+        :return: The sum of the work of all blocks.
+        """
+        return self.chain_work[-1] if self.chain_work else 0
+
+    def rollback(self, height):
+        """
+        Remove the blocks above a height and revert their UTXO changes with the undo logs.
+        The cost is proportional to the number of removed blocks.
+
+        :param height: The number of blocks to keep.
+        :return: The removed blocks, oldest first.
+        """
+        abandoned = []
+        while len(self.chain) > height:
+            block = self.chain.pop()
+            self.chain_work.pop()
+            self.UTXOs.rollback(self.undo_logs.pop())
+            self.transactions_set.difference_update(tx.transaction_id for tx in block.transactions_list)
+            self.index.remove_block(len(self.chain), block)
+            abandoned.append(block)
+        abandoned.reverse()
+
+        if self.store is not None and abandoned:
+            self.store.truncate(height)
+        return abandoned
 
     def validate_chain(self):
         """
@@ -38,74 +176,130 @@ class Blockchain:
                     return False
         return True
 
-    @staticmethod
-    def resolve_conflict(node):
+    def find_transaction(self, transaction_id: bytes):
         """
-        Consensus Algorithm: Resolves conflicts by replacing the local chain with the
-        longest valid chain found in the network.
+        Locate a confirmed transaction in the chain through the transaction index.
 
-        :param node: The node instance initiating the conflict resolution.
+        :param transaction_id: The 32-byte transaction ID.
+        :return: A (block height, position in block) tuple, or None if the transaction is not in the chain.
         """
-        Logger.warning("Conflict Detected: Initiating Consensus Protocol...")
+        return self.index.lookup(transaction_id)
+
+    def next_target(self):
+        """
+        Returns the proof-of-work target for the next block.
+        Every RETARGET_INTERVAL blocks the target is scaled by the ratio of the actual to the
+        expected time of the last interval (clamped to a factor of 4), moving the block time
+        towards TARGET_BLOCK_TIME. Between retargets the target of the last block is kept.
 
-        current_max_length = len(node.blockchain.chain)
-        best_node = None
+        :return: The integer target of the next block.
+        """
+        if not self.chain:
+            return self.initial_target
 
-        # 1. Query all other nodes for their chain length
-        for peer in node.ring.values():
-            if peer['id'] != node.id:
-                try:
-                    url = f"http://{peer['ip']}:{peer['port']}/blockchain/length"
-                    response = requests.get(url, timeout=3)
+        last = self.chain[-1]
+        height = len(self.chain)
+        if TARGET_BLOCK_TIME <= 0 or height <= RETARGET_INTERVAL or height % RETARGET_INTERVAL != 0:
+            return last.target
 
-                    if response.status_code == 200:
-                        peer_length = response.json().get('chain_length', 0)
+        first = self.chain[-1 - RETARGET_INTERVAL]
+        expected = RETARGET_INTERVAL * TARGET_BLOCK_TIME
+        actual = min(max(last.timestamp - first.timestamp, expected / 4), expected * 4)
 
-                        if peer_length > current_max_length:
-                            current_max_length = peer_length
-                            best_node = peer
-                            Logger.network(f"Found longer chain candidate at Node {peer['id']} (Len: {peer_length})")
-                except requests.exceptions.RequestException:
-                    Logger.error(f"Consensus Error: Could not reach Node {peer['id']}")
+        return min(last.target * int(actual * 1000) // int(expected * 1000), MAX_TARGET)
 
-        # 2. Evaluate results
-        if best_node:
-            Logger.info(f"Downloading new chain from Node {best_node['id']}...")
+    def block_locator(self):
+        """
+        Build a block locator: the (height, hash) of the last ten blocks, then of blocks
+        exponentially further back, ending with the genesis block. It has O(log n) entries
+        and lets a peer find the fork point with the local chain.
 
-            # 3. Fetch the new chain
-            try:
-                url = f"http://{best_node['ip']}:{best_node['port']}/blockchain"
-                response = requests.get(url, timeout=10)
-                new_chain = pickle.loads(response.content)
+        :return: A list of (height, hash) tuples, newest first.
+        """
+        locator = []
+        height, step = len(self.chain) - 1, 1
+        while height > 0:
+            locator.append((height, self.chain[height].hash))
+            if len(locator) >= 10:
+                step *= 2
+            height -= step
+        if self.chain:
+            locator.append((0, self.chain[0].hash))
+        return locator
+
+    def locate(self, locator):
+        """
+        Find the fork point of the local chain with a peer's block locator.
+
+        :param locator: A list of (height, hash) tuples, newest first.
+        :return: The number of blocks both chains share.
+        """
+        for height, block_hash in locator:
+            if 0 <= height < len(self.chain) and self.chain[height].hash == block_hash:
+                return height + 1
+        return 0
 
-                # 4. Replace local chain
-                node.blockchain = new_chain
+    @staticmethod
+    def resolve_conflict(node):
+        """
+        Consensus Algorithm: Resolves conflicts by switching to the valid chain with the most cumulative work
+        found in the network. Synchronization is headers-first: the chain work of all peers is queried in parallel, the best
+        peer returns the headers after the fork point found from our block locator, and the missing blocks
+        are downloaded in ranges from all peers that have them. Traffic is proportional to the gap.
+        Only the blocks after the fork point are rolled back and applied (see Node.reorganize()).
+        Must be called with the node's processing_block_lock held.
 
-                Logger.success(
-                    f"Chain replaced | Source: Node {best_node['id']} | New Length: {len(node.blockchain.chain)}"
-                )
-                return
+        :param node: The node instance initiating the conflict resolution.
+        """
+        Logger.warning("Conflict Detected: Initiating Consensus Protocol...")
 
-            except Exception as e:
-                Logger.error(f"Failed to download chain from Node {best_node['id']}: {e}")
+        # 1. Query all other nodes for their chain work
+        local_work = node.blockchain.total_work()
+        peers = [peer for peer in node.ring.values() if peer['id'] != node.id]
+        candidates = sorted(
+            ((peer, length, work) for peer, length, work in fetch_lengths(node.transport, peers) if work > local_work),
+            key=lambda candidate: candidate[2],
+            reverse=True
+        )
 
-        else:
+        # 2. Evaluate results
+        if not candidates:
             Logger.success("Local chain is authoritative. No changes made.")
+            return
+
+        best_node, best_length, _ = candidates[0]
+        Logger.network(f"Found heavier chain candidate at Node {best_node['id']} (Len: {best_length})")
+
+        # 3. Fetch the headers after the fork point, then the blocks from every peer that has them
+        result = fetch_headers(node.transport, best_node, node.blockchain)
+        if result is None:
+            Logger.error(f"Failed to download headers from Node {best_node['id']}")
+            return
+        fork_height, headers = result
+        if fork_height == 0:
+            Logger.error(f"Chain of Node {best_node['id']} has a different genesis block")
+            return
+
+        end = fork_height + len(headers)
+        sources = [best_node] + [peer for peer, length, _ in candidates[1:] if length >= end]
+        Logger.info(f"Downloading blocks {fork_height}-{end - 1} from {len(sources)} node(s)...")
+        branch = fetch_blocks(node.transport, sources, fork_height, headers)
+        if branch is None:
+            Logger.error("Failed to download the missing blocks")
+            return
+
+        # 4. Switch to the new branch from the fork point
+        if node.reorganize(fork_height, branch):
+            Logger.success(
+                f"Chain reorganized | Source: Node {best_node['id']} | Fork height: {fork_height} | "
+                f"New Length: {len(node.blockchain.chain)}"
+            )
 
     def wallet_balance(self, client_id):
         """
-        Calculates the total balance for a specific wallet by summing its UTXOs.
+        Returns the total balance for a specific wallet from the UTXO index.
 
         :param client_id: The ID of the client (node) to check.
         :return: The total float balance of the client.
        """
-        balance = 0.0
-        try:
-            # Ensure the client_id exists in the UTXO list
-            if client_id < len(self.UTXOs):
-                for utxo in self.UTXOs[client_id]:
-                    balance += utxo.amount
-        except IndexError:
-            Logger.error(f"Wallet Check Error: Client ID {client_id} not found in UTXOs.")
-
-        return balance
\ No newline at end of file
+        return float(self.UTXOs.balance(client_id))
@@ -0,0 +1,76 @@
+from bisect import bisect_left
+
+
+class ChainIndex:
+
+    def __init__(self):
+        """
+        Initialize empty secondary indexes of the chain.
+        Blocks are located by hash and transactions by (block height, position in block). Every address has the
+        locations of its transactions in chain order, so history pages are found by bisection.
+        All indexes are updated per block and unwound in O(block size) on rollbacks.
+        """
+        self.blocks = {}        # {block hash: height}
+        self.transactions = {}  # {transaction ID: (height, position)}
+        self.history = {}       # {address: [(height, position), ...]}, oldest first
+
+    def add_block(self, height: int, block):
+        """
+        Index the transactions of a block appended at a height.
+
+        :param height: The height of the block.
+        :param block: The Block.
+        """
+        self.blocks[block.hash] = height
+        for position, tx in enumerate(block.transactions_list):
+            location = (height, position)
+            self.transactions[tx.transaction_id] = location
+            for address in {tx.sender_address, tx.receiver_address}:
+                self.history.setdefault(address, []).append(location)
+
+    def remove_block(self, height: int, block):
+        """
+        Remove the transactions of the block at the tip of the chain from the indexes.
+
+        :param height: The height of the block.
+        :param block: The Block.
+        """
+        self.blocks.pop(block.hash, None)
+        for position in range(len(block.transactions_list) - 1, -1, -1):
+            tx = block.transactions_list[position]
+            self.transactions.pop(tx.transaction_id, None)
+            for address in {tx.sender_address, tx.receiver_address}:
+                locations = self.history[address]
+                if locations and locations[-1] == (height, position):
+                    locations.pop()
+
+    def block_height(self, block_hash):
+        """
+        Returns the height of a block of the chain.
+
+        :param block_hash: The block hash.
+        :return: The height, or None if the block is not in the chain.
+        """
+        return self.blocks.get(block_hash)
+
+    def lookup(self, transaction_id: bytes):
+        """
+        Locate a confirmed transaction.
+
+        :param transaction_id: The 32-byte transaction ID.
+        :return: A (block height, position in block) tuple, or None if the transaction is not in the chain.
+        """
+        return self.transactions.get(transaction_id)
+
+    def address_history(self, address, cursor=None, limit=50):
+        """
+        Returns a page of the transactions of an address, newest first.
+
+        :param address: The wallet address.
+        :param cursor: The (height, position) of the last transaction of the previous page, None for the first page.
+        :param limit: The maximum number of locations to return.
+        :return: A list of (height, position) tuples.
+        """
+        locations = self.history.get(address, [])
+        end = len(locations) if cursor is None else bisect_left(locations, tuple(cursor))
+        return locations[max(0, end - limit):end][::-1]
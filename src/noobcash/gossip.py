@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+import os
+import random
+import threading
+
+load_dotenv()
+GOSSIP_FANOUT = int(os.getenv('GOSSIP_FANOUT', 0))  # Peers a message is forwarded to, 0 broadcasts to every peer
+GOSSIP_TTL = int(os.getenv('GOSSIP_TTL', 6))  # Hops a message travels at most
+SEEN_CACHE_SIZE = int(os.getenv('SEEN_CACHE_SIZE', 100000))  # Message IDs remembered for duplicate suppression
+TTL_HEADER = 'X-Gossip-TTL'
+
+
+class SeenCache:
+
+    def __init__(self, size: int):
+        """
+        Initialize a bounded set of message IDs, the oldest are forgotten first.
+
+        :param size: The maximum number of IDs.
+        """
+        self.size = size
+        self.ids = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, message_id):
+        """
+        Remember a message ID.
+
+        :param message_id: A block hash or transaction ID.
+        :return: True if the ID was new, False if it was seen before.
+        """
+        with self.lock:
+            if message_id in self.ids:
+                return False
+            self.ids[message_id] = None
+            if len(self.ids) > self.size:
+                self.ids.popitem(last=False)
+            return True
+
+    def __contains__(self, message_id):
+        return message_id in self.ids
+
+
+class Gossip:
+
+    def __init__(self, fanout: int = GOSSIP_FANOUT, ttl: int = GOSSIP_TTL, seen_size: int = SEEN_CACHE_SIZE):
+        """
+        Initialize the dissemination policy of blocks and transactions.
+        With a fanout, a node sends a message to that many random peers instead of all of them, and every
+        receiver forwards a message it sees for the first time to its own random peers until the TTL runs out.
+        Messages per broadcast grow with n * fanout instead of n^2; duplicates are suppressed with a seen cache.
+
+        :param fanout: The number of peers per hop, 0 (or at least the number of peers) for a full broadcast
+                       without forwarding.
+        :param ttl: The number of hops of a new message.
+        :param seen_size: The capacity of the seen cache.
+        """
+        self.fanout = fanout
+        self.ttl = ttl
+        self.seen = SeenCache(seen_size)
+
+    @property
+    def enabled(self):
+        """
+        Whether receivers forward messages (gossip) instead of relying on a full broadcast by the origin.
+        """
+        return self.fanout > 0
+
+    def targets(self, peers):
+        """
+        Choose the peers a message is sent to.
+
+        :param peers: The candidate ring entries (without the local node and the peer the message came from).
+        :return: The chosen ring entries.
+        """
+        if not self.enabled or self.fanout >= len(peers):
+            return list(peers)
+        return random.sample(peers, self.fanout)
+
+    def forward_ttl(self, ttl):
+        """
+        Returns the TTL of a received message when forwarded, or 0 if it is not forwarded.
+
+        :param ttl: The TTL the message was received with, None if the sender did not gossip.
+        """
+        if not self.enabled or ttl is None:
+            return 0
+        return max(0, ttl - 1)
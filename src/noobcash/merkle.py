@@ -0,0 +1,88 @@
+import hashlib
+
+LEAF_PREFIX = b'\x00'   # Domain separation of leaves and inner nodes (as in RFC 6962)
+NODE_PREFIX = b'\x01'
+EMPTY_ROOT = bytes(32)
+
+
+def hash_leaf(leaf: bytes):
+    """
+    Hash a leaf (transaction ID) of the merkle tree.
+
+    :param leaf: The leaf bytes.
+    :return: The 32-byte leaf hash.
+    """
+    return hashlib.sha256(LEAF_PREFIX + leaf).digest()
+
+
+def hash_node(left: bytes, right: bytes):
+    """
+    Hash two child hashes into their parent node.
+
+    :param left: The left child hash.
+    :param right: The right child hash.
+    :return: The 32-byte node hash.
+    """
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_levels(leaves):
+    """
+    Build all levels of the merkle tree, from the leaf hashes up to the root.
+    An odd node at the end of a level is promoted to the next level unchanged.
+
+    :param leaves: A list of leaf bytes.
+    :return: A list of levels, each a list of hashes.
+    """
+    levels = [[hash_leaf(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves):
+    """
+    Compute the merkle root of a list of leaves.
+
+    :param leaves: A list of leaf bytes.
+    :return: The 32-byte root, or 32 zero bytes for an empty list.
+    """
+    if not leaves:
+        return EMPTY_ROOT
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_proof(leaves, index: int):
+    """
+    Build the inclusion proof of the leaf at the given index.
+
+    :param leaves: A list of leaf bytes.
+    :param index: The index of the leaf to prove.
+    :return: A list of (sibling hash, sibling is left) tuples from the leaf up to the root.
+    """
+    proof = []
+    for level in merkle_levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append((level[sibling], sibling < index))
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: bytes, proof, root: bytes):
+    """
+    Verify an inclusion proof against a merkle root.
+
+    :param leaf: The leaf bytes (transaction ID).
+    :param proof: A list of (sibling hash, sibling is left) tuples.
+    :param root: The expected merkle root.
+    :return: True if the leaf is included under the root, False otherwise.
+    """
+    current = hash_leaf(leaf)
+    for sibling, is_left in proof:
+        current = hash_node(sibling, current) if is_left else hash_node(current, sibling)
+    return current == root
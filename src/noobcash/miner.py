@@ -0,0 +1,192 @@
+import hashlib
+import multiprocessing
+import queue
+import time
+
+from src.noobcash.block import HEADER_NONCE
+
+NONCE_SPACE = 2 ** 32   # Nonces are 32-bit unsigned integers
+CHECK_INTERVAL = 1024   # Attempts between two checks of the cancellation flag
+POLL_INTERVAL = 0.001   # Seconds the coordinator waits for a worker result per poll
+IDLE_TIMEOUT = 1.0      # Seconds an idle worker waits for a job before checking its parent is alive
+
+
+def _mine_worker(index, jobs, results, generation, hash_counts, hash_rates):
+    """
+    Worker process loop. Waits for jobs and searches its slice of the nonce space.
+
+    A job is cancelled as soon as the shared generation counter no longer matches the job id,
+    which is checked every CHECK_INTERVAL attempts.
+
+    :param index: Index of this worker inside the pool.
+    :param jobs: Queue delivering (job_id, header_prefix, target, nonce_start, nonce_end) tuples.
+    :param results: Queue receiving (job_id, worker_index, nonce, hash) tuples.
+    :param generation: Shared id of the job that is currently allowed to run.
+    :param hash_counts: Shared array with the total number of hashes per worker.
+    :param hash_rates: Shared array with the hash rate (hashes/sec) of the last job per worker.
+    """
+    while True:
+        try:
+            job = jobs.get(timeout=IDLE_TIMEOUT)
+        except queue.Empty:
+            # Exit together with the node process
+            if not multiprocessing.parent_process().is_alive():
+                return
+            continue
+        if job is None:
+            return
+
+        job_id, header_prefix, target, nonce, nonce_end = job
+        midstate = hashlib.sha256(header_prefix)
+        pack_nonce = HEADER_NONCE.pack
+        started = time.perf_counter()
+        attempts = 0
+        found = None
+
+        while nonce < nonce_end:
+            if attempts % CHECK_INTERVAL == 0 and attempts:
+                hash_counts[index] += CHECK_INTERVAL
+                hash_rates[index] = attempts / (time.perf_counter() - started)
+                if generation.value != job_id:
+                    break
+
+            header = midstate.copy()
+            header.update(pack_nonce(nonce))
+            digest = header.digest()
+            if int.from_bytes(digest, 'big') <= target:
+                found = (nonce, digest.hex())
+                break
+            nonce += 1
+            attempts += 1
+
+        if found:
+            results.put((job_id, index, found[0], found[1]))
+        elif nonce >= nonce_end:
+            # Slice exhausted without a solution
+            results.put((job_id, index, None, None))
+
+
+class Miner:
+    def __init__(self, workers: int):
+        """
+        Initialize a multi-process Proof-of-Work engine.
+        The nonce space is split into equal slices, one per worker process.
+
+        :param workers: The number of worker processes to use.
+        """
+        self.workers = max(1, workers)
+        self.processes = []
+        self.jobs = []
+        self.results = None
+        self.job_id = 0
+
+        self.generation = None
+        self.hash_counts = None
+        self.hash_rates = None
+
+    def start(self):
+        """
+        Starts the worker processes. Called lazily on the first mining round.
+        Workers are spawned (not forked) so they do not inherit the sockets of the API server.
+        """
+        if self.processes:
+            return
+
+        context = multiprocessing.get_context('spawn')
+        self.results = context.Queue()
+        self.generation = context.RawValue('q', 0)
+        self.hash_counts = context.RawArray('Q', self.workers)
+        self.hash_rates = context.RawArray('d', self.workers)
+
+        for i in range(self.workers):
+            jobs = context.Queue()
+            process = context.Process(
+                target=_mine_worker,
+                args=(i, jobs, self.results, self.generation, self.hash_counts, self.hash_rates),
+                daemon=True,
+                name=f"MinerWorker-{i}"
+            )
+            process.start()
+            self.jobs.append(jobs)
+            self.processes.append(process)
+
+    def stop(self):
+        """
+        Cancels the running job. Workers notice it within CHECK_INTERVAL attempts.
+        """
+        if self.generation is not None:
+            self.generation.value = -1
+
+    def dispatch(self, block):
+        """
+        Hands a new job with the given block template to every worker.
+        The header prefix is serialized once here; workers only hash the nonce on top of it.
+
+        :param block: The Block instance to mine.
+        :return: The id of the dispatched job.
+        """
+        self.job_id += 1
+        self.generation.value = self.job_id
+
+        header_prefix = block.header_prefix()
+        span = NONCE_SPACE // self.workers
+        for i, jobs in enumerate(self.jobs):
+            nonce_end = NONCE_SPACE if i == self.workers - 1 else (i + 1) * span
+            jobs.put((self.job_id, header_prefix, block.target, i * span, nonce_end))
+
+        return self.job_id
+
+    def mine(self, block, interrupted):
+        """
+        Searches a nonce for the block across all workers until the hash meets the block's target.
+        On success the nonce and hash are written to the block.
+
+        :param block: The Block instance to mine.
+        :param interrupted: Callable returning True when mining must be aborted.
+        :return: True if a nonce was found, False if mining was interrupted.
+        """
+        self.start()
+        job_id = self.dispatch(block)
+        exhausted = 0
+
+        while True:
+            if interrupted():
+                self.stop()
+                return False
+
+            try:
+                result_id, worker, nonce, block_hash = self.results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            # Late result of a cancelled job
+            if result_id != job_id:
+                continue
+
+            if nonce is None:
+                exhausted += 1
+                if exhausted == self.workers:
+                    # Whole nonce space searched: refresh the template and start over
+                    block.timestamp = time.time()
+                    job_id = self.dispatch(block)
+                    exhausted = 0
+                continue
+
+            self.stop()
+            block.nonce = nonce
+            block.hash = block_hash
+            return True
+
+    def stats(self):
+        """
+        Returns the hash rate statistics of every worker.
+
+        :return: A list of dictionaries with the worker index, hash rate and total hashes.
+        """
+        if not self.processes:
+            return [{'worker': i, 'hash_rate': 0.0, 'hashes': 0} for i in range(self.workers)]
+
+        return [
+            {'worker': i, 'hash_rate': self.hash_rates[i], 'hashes': self.hash_counts[i]}
+            for i in range(self.workers)
+        ]
@@ -1,23 +1,44 @@
 from collections import deque
-from copy import deepcopy
 from dotenv import load_dotenv
 import requests
-import pickle
 import os
-import random
 import threading
+import time
 
 from src.noobcash.block import Block
-from src.noobcash.blockchain import Blockchain
+from src.noobcash.block_tree import BlockTree, block_work
+from src.noobcash.blockchain import Blockchain, MAX_BLOCK_SIZE, target_to_bits
 from src.noobcash.dump import Dump
+from src.noobcash.gossip import Gossip, TTL_HEADER
+from src.noobcash.miner import Miner
+from src.noobcash.ring import Ring
+from src.noobcash.sealing import SealingPolicy
+from src.noobcash.signatures import get_scheme
+from src.noobcash.storage import BlockStore
+from src.noobcash.sync import fetch_block_transactions
+from src.noobcash.transport import Coalescer, PeerTransport
 from src.noobcash.transaction import Transaction
-from src.noobcash.utxo import UTXO
+from src.noobcash.validation import CHECKPOINTS, ChainValidator
+from src.noobcash.verifier import SignatureVerifier
 from src.noobcash.wallet import Wallet
+from src.noobcash.wire import BLOCK, CHAIN, COMPACT_BLOCK, RING, SHORT_ID_SIZE, TRANSACTIONS, encode
 from src.utils.logger import Logger
 
 load_dotenv()
-BLOCK_SIZE = int(os.getenv('BLOCK_SIZE', 5))
+BLOCK_MAX_WAIT = float(os.getenv('BLOCK_MAX_WAIT', 5))
 MINING_DIFFICULTY = int(os.getenv('MINING_DIFFICULTY', 4))
+MINING_WORKERS = int(os.getenv('MINING_WORKERS', os.cpu_count() or 1))
+VERIFY_WORKERS = int(os.getenv('VERIFY_WORKERS', os.cpu_count() or 1))
+VERIFIED_CACHE_SIZE = int(os.getenv('VERIFIED_CACHE_SIZE', 100000))
+VERIFY_PARALLEL_THRESHOLD = int(os.getenv('VERIFY_PARALLEL_THRESHOLD', 8))
+DATA_DIR = os.getenv('DATA_DIR', '')  # Empty: the node keeps its state in memory only
+SNAPSHOT_INTERVAL = int(os.getenv('SNAPSHOT_INTERVAL', 100))
+BLOCK_TREE_DEPTH = int(os.getenv('BLOCK_TREE_DEPTH', 100))  # Blocks below the tip for which side branches are kept
+ORPHAN_POOL_SIZE = int(os.getenv('ORPHAN_POOL_SIZE', 100))
+ORPHAN_GRACE = float(os.getenv('ORPHAN_GRACE', 2))  # Seconds an orphan waits for its parent before a sync
+TX_BATCH_SIZE = int(os.getenv('TX_BATCH_SIZE', 50))  # Transactions per gossip batch
+TX_BATCH_WINDOW = float(os.getenv('TX_BATCH_WINDOW', 0.05))  # Seconds a transaction waits for its batch to fill
+COMPACT_BLOCKS = int(os.getenv('COMPACT_BLOCKS', 1))  # 0 relays blocks with all their transactions
 
 
 class Node:
@@ -31,19 +52,76 @@ class Node:
         self.ip = None
         self.port = None
         self.id = None
-        self.ring = {}  # {address: {id, ip, port, balance}}
+        self.ring = Ring()  # Membership table: {id, ip, port, address, public_key, balance} per node
         self.blockchain = Blockchain()
         self.is_bootstrap = False
         self.current_block = None
         self.is_mining = False
-        self.incoming_block = False
         self.processing_block = False
-        self.pending_transactions = deque()
+        self.pending_transactions = deque()  # Mutated under pending_lock
+        self.pending_ids = set()  # IDs of transactions in the pool or the current block template
         self.temp_utxos = None
+        self.template_opened_at = None
+        self.sealing = SealingPolicy(
+            self.blockchain.minBlockTransactions,
+            self.blockchain.maxBlockTransactions,
+            BLOCK_MAX_WAIT
+        )
+
+        self.new_transaction = threading.Event()
 
-        self.incoming_block_lock = threading.Lock()
         self.processing_block_lock = threading.Lock()
-        self.dump = Dump(total_nodes, BLOCK_SIZE, MINING_DIFFICULTY)
+        self.pending_lock = threading.Lock()
+        self.dump = Dump(total_nodes, MAX_BLOCK_SIZE, MINING_DIFFICULTY)
+        self.miner = Miner(MINING_WORKERS)
+        self.verifier = SignatureVerifier(lambda: self.ring, VERIFY_WORKERS, VERIFIED_CACHE_SIZE, VERIFY_PARALLEL_THRESHOLD)
+        self.validator = ChainValidator(self.verifier, CHECKPOINTS)
+        self.tree = BlockTree(BLOCK_TREE_DEPTH, ORPHAN_POOL_SIZE)
+        self.transport = PeerTransport()
+        self.outgoing_transactions = Coalescer(self.broadcast_transactions, TX_BATCH_SIZE, TX_BATCH_WINDOW)
+        self.gossip = Gossip()
+        self.compact_stats = {'received': 0, 'complete': 0, 'transactions_fetched': 0, 'failed': 0}
+        self.orphan_timer = None
+        self.store = None
+
+    # --- Persistence ---
+
+    def open_store(self, path):
+        """
+        Opens the block store in the node's data directory and restores a previous run from it:
+        the node identity (id, wallet key, ring), the chain and the UTXO set.
+
+        :param path: The data directory of the node.
+        :return: True if a previous state was restored, False for a new node.
+        """
+        self.store = BlockStore(path, SNAPSHOT_INTERVAL)
+        state = self.store.load_state()
+        if state is None or not self.store.height:
+            return False
+
+        self.id = state['id']
+        self.ring = state['ring']
+        self.wallet = Wallet(state['private_key'])
+        self.blockchain.restore(self.store)
+        self.reconcile_balances()
+        self.refresh_wallet_history()
+        self.temp_utxos = self.blockchain.UTXOs.overlay()
+        self.create_new_block()
+        return True
+
+    def save_state(self):
+        """
+        Persists the node identity (id, wallet key, ring) and starts persisting the chain, if a data directory is used.
+        """
+        if self.store is None:
+            return
+        self.store.save_state({
+            'id': self.id,
+            'private_key': get_scheme().export_private_key(self.wallet.private_key),
+            'ring': self.ring
+        })
+        if self.blockchain.store is None:
+            self.blockchain.attach_store(self.store)
 
     # --- Block & Transaction Management ---
 
@@ -54,16 +132,79 @@ class Node:
         :return: The newly created Block instance.
         """
         prev_hash = 1 if not self.blockchain.chain else self.blockchain.chain[-1].hash
-        self.current_block = Block(prev_hash)
+        target = self.blockchain.next_target()
+        if self.blockchain.chain and target != self.blockchain.chain[-1].target:
+            Logger.mining(
+                f"Difficulty retarget at height {len(self.blockchain.chain)} | "
+                f"{target_to_bits(self.blockchain.chain[-1].target):.2f} -> {target_to_bits(target):.2f} bits"
+            )
+
+        self.current_block = Block(prev_hash, target)
         return self.current_block
 
     def add_transaction_to_pending(self, transaction: Transaction):
         """
-        Adds a transaction to the pool and starts the mining thread if idle.
+        Verifies the signature of a transaction, adds it to the pool and starts the mining thread if idle.
+        Transactions already known by ID (pending or confirmed) are ignored.
 
         :param transaction: The Transaction object to be added.
+        :return: True if the transaction was admitted, False if it is a duplicate or its signature is invalid.
+        """
+        with self.pending_lock:
+            if transaction.transaction_id in self.pending_ids or \
+                    transaction.transaction_id in self.blockchain.transactions_set:
+                Logger.warning("Transaction NOT admitted: Duplicate")
+                return False
+            self.pending_ids.add(transaction.transaction_id)
+
+        valid = self.verifier.verify(transaction)
+        with self.pending_lock:
+            if not valid:
+                Logger.error("Transaction NOT admitted: Invalid signature")
+                self.pending_ids.discard(transaction.transaction_id)
+                return False
+            self.pending_transactions.appendleft(transaction)
+
+        self.new_transaction.set()
+        self.start_mining()
+        return True
+
+    def add_transactions_to_pending(self, transactions):
+        """
+        Admits a batch of transactions received from a peer to the pool.
+        Duplicates are skipped and the signatures of the rest are verified as one batch.
+
+        :param transactions: The list of Transaction objects, in the order they were created.
+        :return: The list of admitted transactions.
+        """
+        with self.pending_lock:
+            fresh = []
+            for tx in transactions:
+                if tx.transaction_id in self.pending_ids or tx.transaction_id in self.blockchain.transactions_set:
+                    continue
+                self.pending_ids.add(tx.transaction_id)
+                fresh.append(tx)
+
+        admitted = []
+        results = self.verifier.verify_batch(fresh)
+        with self.pending_lock:
+            for tx, valid in zip(fresh, results):
+                if valid:
+                    self.pending_transactions.appendleft(tx)
+                    admitted.append(tx)
+                else:
+                    Logger.error("Transaction NOT admitted: Invalid signature")
+                    self.pending_ids.discard(tx.transaction_id)
+
+        if admitted:
+            self.new_transaction.set()
+            self.start_mining()
+        return admitted
+
+    def start_mining(self):
+        """
+        Starts the mining thread if it is idle.
         """
-        self.pending_transactions.appendleft(transaction)
         if self.current_block is None:
             self.create_new_block()
 
@@ -84,8 +225,8 @@ class Node:
 
         :param tx: The validated Transaction to process.
         """
-        sender_addr = str(tx.sender_address)
-        receiver_addr = str(tx.receiver_address)
+        sender_addr = tx.sender_address
+        receiver_addr = tx.receiver_address
 
         if tx.receiver_address == self.wallet.address or tx.sender_address == self.wallet.address:
             self.wallet.transactions.append(tx)
@@ -105,40 +246,17 @@ class Node:
         """
         Internal helper to update a specific UTXO set based on transaction flow.
 
-        :param utxo_set: The UTXO dictionary to modify (temp or original).
+        :param utxo_set: The UTXOSet or UTXOView to modify.
         :param tx: The transaction causing the UTXO movement.
         """
-        s_addr, r_addr = str(tx.sender_address), str(tx.receiver_address)
-        s_id, r_id = self.ring[s_addr]['id'], self.ring[r_addr]['id']
-
-        # Credit receiver
-        utxo_set[r_id].append(UTXO(s_id, r_id, tx.amount))
-
-        # Debit sender
-        accumulated = 0
-        while accumulated < tx.amount:
-            try:
-                utxo = utxo_set[s_id].popleft()
-                accumulated += utxo.amount
-            except IndexError:
-                Logger.error(f"UTXO Critical Error: Node {s_id} has insufficient funds.")
-                break
-
-        # Change handling
-        if accumulated > tx.amount:
-            utxo_set[s_id].append(UTXO(s_id, s_id, accumulated - tx.amount))
-
-    def update_original_utxos(self, tx: Transaction):
-        """
-        Updates the authoritative UTXO set in the blockchain.
+        s_id, r_id = self.ring[tx.sender_address]['id'], self.ring[tx.receiver_address]['id']
 
-        :param tx: The validated Transaction to process.
-        """
-        self._process_utxo_update(self.blockchain.UTXOs, tx)
+        if not utxo_set.apply_transaction(tx, s_id, r_id):
+            Logger.error(f"UTXO Critical Error: Node {s_id} has insufficient funds.")
 
     def update_temp_utxos(self, tx: Transaction):
         """
-        Updates the temporary UTXO set used during the mining of the current block.
+        Updates the temporary UTXO view used during the mining of the current block.
 
         :param tx: The Transaction to process.
         """
@@ -146,64 +264,97 @@ class Node:
 
     # --- Mining Logic ---
 
-    def mine_process(self):
+    def fill_block(self):
         """
-        Main mining loop.
-        - Uses temp UTXOs
-        - Does NOT lose transactions
-        - Drops permanently invalid transactions
-        - Safely handles incoming blocks
+        Moves valid pending transactions into the current block template until it reaches the maximum block size.
+        Drops transactions that are already confirmed or permanently invalid.
         """
+        while self.pending_transactions and \
+                len(self.current_block.transactions_list) < self.sealing.max_size:
 
-        self.is_mining = True
-
-        # 🔑 Initialize temporary UTXO state for this mining round
-        self.temp_utxos = deepcopy(self.blockchain.UTXOs)
-
-        while self.pending_transactions:
-
-            Logger.info(
-                "Pending Transaction: " +
-                self.transaction_to_string(self.pending_transactions)
-            )
+            with self.pending_lock:
+                pending = list(self.pending_transactions)
+            Logger.info("Pending Transaction: " + self.transaction_to_string(pending))
 
             # Peek — do NOT remove yet
             tx = self.pending_transactions[-1]
 
             # Already confirmed elsewhere → drop
             if tx.transaction_id in self.blockchain.transactions_set:
-                self.pending_transactions.pop()
+                with self.pending_lock:
+                    self.pending_transactions.pop()
+                    self.pending_ids.discard(tx.transaction_id)
                 continue
 
-            sender_id = self.ring[str(tx.sender_address)]['id']
+            sender_id = self.ring[tx.sender_address]['id']
 
             # Permanently invalid → drop
-            if not tx.validate_transaction(sender_id, self.temp_utxos):
+            if not tx.validate_transaction(sender_id, self.temp_utxos, self.verifier):
                 Logger.error("Transaction NOT Validated: Not enough coins — dropping")
-                self.pending_transactions.pop()
+                with self.pending_lock:
+                    self.pending_transactions.pop()
+                    self.pending_ids.discard(tx.transaction_id)
                 continue
 
             # Valid transaction -> tentatively add to block
+            if not self.current_block.transactions_list:
+                self.template_opened_at = time.time()
             self.current_block.transactions_list.append(tx)
             self.update_temp_utxos(tx)
-            self.pending_transactions.pop()
+            with self.pending_lock:
+                self.pending_transactions.pop()
 
-            # Block full -> mine it
-            if len(self.current_block.transactions_list) == BLOCK_SIZE:
+    def mine_process(self):
+        """
+        Main mining loop.
+        - Uses temp UTXOs
+        - Does NOT lose transactions
+        - Drops permanently invalid transactions
+        - Seals the block when it is full or its oldest transaction waited BLOCK_MAX_WAIT seconds
+        - Safely handles incoming blocks
+        """
+
+        self.is_mining = True
 
-                Logger.mining(
-                    f"Block Full. Starting Proof-of-Work for transactions: "
-                    f"{self.transaction_to_string(self.current_block.transactions_list)}"
-                )
+        # 🔑 Initialize temporary UTXO view for this mining round
+        self.temp_utxos = self.blockchain.UTXOs.overlay()
 
-                mined = self.mine_block(self.current_block)
+        while self.pending_transactions or self.current_block.transactions_list:
 
-                with self.processing_block_lock:
+            with self.processing_block_lock:
+                self.new_transaction.clear()
 
-                    # Mining succeeded and no conflicting block arrived
-                    if mined and not self.incoming_block and \
-                            self.current_block.validate_block(self.blockchain):
+                # A block arrived while waiting: its handler already returned our template to the pool
+                if self.blockchain.chain and self.current_block.previous_hash != self.blockchain.chain[-1].hash:
+                    self.create_new_block()
+                    self.temp_utxos = self.blockchain.UTXOs.overlay()
 
+                self.fill_block()
+
+            size = len(self.current_block.transactions_list)
+            if not size:
+                continue
+
+            # Not ready yet -> wait for more transactions or for the sealing timer
+            if not self.sealing.should_seal(size, self.template_opened_at):
+                self.new_transaction.wait(self.sealing.remaining(size, self.template_opened_at))
+                continue
+
+            Logger.mining(
+                f"Block sealed. Starting Proof-of-Work for transactions: "
+                f"{self.transaction_to_string(self.current_block.transactions_list)}"
+            )
+
+            mined = self.mine_block(self.current_block)
+
+            with self.processing_block_lock:
+
+                # Mining succeeded and the block still extends the tip
+                if mined and self.current_block.validate_block(self.blockchain):
+
+                    # The block is applied like a received one, so a bad template is never committed or broadcast
+                    self.temp_utxos.discard()
+                    if self.apply_block(self.current_block):
                         Logger.mining(
                             f"Block mined successfully | Miner: Node {self.id} | "
                             f"Hash: {self.current_block.hash[:15]}... | "
@@ -211,39 +362,38 @@ class Node:
                             f"Nonce: {self.current_block.nonce}"
                         )
 
-                        # Commit block
-                        self.blockchain.chain.append(self.current_block)
-                        self.blockchain.UTXOs = deepcopy(self.temp_utxos)
-
                         for t in self.current_block.transactions_list:
                             self.update_wallet_state(t)
-                            self.blockchain.transactions_set.add(t.transaction_id)
 
                         self.dump.timestamp()
                         self.broadcast_block(self.current_block)
-
-                    # Either mined by someone else or interrupted
                     else:
-                        Logger.mining("Mining aborted — block mined elsewhere")
+                        Logger.error("Mined block NOT committed: Invalid block template")
+                        self.return_to_pending(self.current_block.transactions_list)
+
+                # Either mined by someone else or interrupted
+                else:
+                    Logger.mining("Mining aborted — block mined elsewhere")
+                    # Handlers only return the template to the pool when they change the tip
+                    if self.blockchain.chain and self.current_block.previous_hash == self.blockchain.chain[-1].hash:
+                        self.return_to_pending(self.current_block.transactions_list)
 
                 # Prepare new block regardless of outcome
                 self.create_new_block()
-                self.temp_utxos = deepcopy(self.blockchain.UTXOs)
+                self.temp_utxos = self.blockchain.UTXOs.overlay()
 
         self.is_mining = False
 
     def mine_block(self, block: Block):
         """
-        Performs the Proof-of-Work by iterating nonces until the difficulty target is met.
+        Performs the Proof-of-Work on the miner's worker processes until the block's target is met.
 
         :param block: The Block instance to mine.
-        :return: True if a nonce was found, False if mining was interrupted by an incoming block.
+        :return: True if a nonce was found, False if mining was interrupted by a change of the tip.
         """
-        target = '0' * MINING_DIFFICULTY
-        while not self.incoming_block:
-            block.nonce = random.getrandbits(32)
-            if block.calculate_hash().startswith(target):
-                return True
+        # The tip stays changed until a new template is built, so a short-lived block handler is never missed
+        if self.miner.mine(block, lambda: block.previous_hash != self.blockchain.chain[-1].hash):
+            return True
 
         Logger.mining("Mining interrupted by network broadcast.")
         return False
@@ -254,12 +404,40 @@ class Node:
 
         :param incoming_block: The Block received from the network.
         """
-        for tx in self.current_block.transactions_list:
-            if tx.transaction_id not in self.blockchain.transactions_set:
-                self.pending_transactions.append(tx)
-
         mined_ids = {tx.transaction_id for tx in incoming_block.transactions_list}
-        self.pending_transactions = deque([t for t in self.pending_transactions if t.transaction_id not in mined_ids])
+        # Rebuilt under pending_lock, so a transaction admitted meanwhile is not left behind in the old deque
+        with self.pending_lock:
+            # A gossiped block may arrive before any transaction opened a template
+            if self.current_block is not None:
+                for tx in self.current_block.transactions_list:
+                    if tx.transaction_id not in self.blockchain.transactions_set:
+                        self.pending_transactions.append(tx)
+            self.pending_transactions = deque(t for t in self.pending_transactions if t.transaction_id not in mined_ids)
+
+    def apply_block(self, block: Block):
+        """
+        Applies the transactions of a validated block to the UTXO set and appends it with its undo record.
+        Nothing is changed if a transaction is repeated or already confirmed, or spends more than its sender owns.
+
+        :param block: The validated Block instance to apply.
+        :return: True if the block was appended, False otherwise.
+        """
+        if not block.has_new_transactions(self.blockchain):
+            Logger.error("Block NOT applied: Repeated transaction")
+            return False
+
+        view = self.blockchain.UTXOs.overlay()
+        for tx in block.transactions_list:
+            if tx.sender_address not in self.ring or tx.receiver_address not in self.ring or \
+                    not view.apply_transaction(tx, self.ring[tx.sender_address]['id'], self.ring[tx.receiver_address]['id']):
+                Logger.error("Block NOT applied: Invalid transaction")
+                view.discard()
+                return False
+
+        self.blockchain.add_block(block, view.commit())
+        for tx in block.transactions_list:
+            self.pending_ids.discard(tx.transaction_id)
+        return True
 
     def add_block_to_chain(self, block: Block):
         """
@@ -267,71 +445,293 @@ class Node:
 
         :param block: The validated Block instance to add.
         """
-        self.blockchain.chain.append(block)
-        for tx in block.transactions_list:
-            self.update_original_utxos(tx)
-            self.update_wallet_state(tx)
-            self.blockchain.transactions_set.add(tx.transaction_id)
+        if self.apply_block(block):
+            for tx in block.transactions_list:
+                self.update_wallet_state(tx)
+
+            # The view of the interrupted template is discarded; only the block's changes reach the UTXO set
+            self.temp_utxos = self.blockchain.UTXOs.overlay()
+            self.update_pending_transactions(block)
+            self.dump.timestamp()
+            Logger.info(f"Chain height increased: {len(self.blockchain.chain)}")
+
+    def apply_branch(self, blocks):
+        """
+        Validates and applies a sequence of blocks on top of the current tip.
+        Hashes and signatures of the whole branch are checked in parallel first (ChainValidator),
+        then linkage, targets and UTXO transitions are replayed in order.
+
+        :param blocks: The blocks to apply, oldest first.
+        :return: The number of blocks applied before the first invalid one.
+        """
+        valid = self.validator.validate(len(self.blockchain.chain), blocks)
+        for applied, block in enumerate(blocks[:valid]):
+            if not block.validate_block(self.blockchain) or not self.apply_block(block):
+                return applied
+        return valid
+
+    def reorganize(self, fork_height, branch):
+        """
+        Switches the local chain to another branch sharing its first fork_height blocks.
+        The blocks above the fork point are rolled back with their undo records and the new branch is applied,
+        so the cost is proportional to the depth of the fork. If the branch contains an invalid block the
+        local chain is restored and the current template is kept. Otherwise the transactions of abandoned blocks
+        and of the current template go back to the pool. Must be called with processing_block_lock held.
+
+        :param fork_height: The number of blocks shared with the branch.
+        :param branch: The blocks of the new branch after the fork point, oldest first.
+        :return: True if the branch was adopted, False otherwise.
+        """
+        previous_work = self.blockchain.total_work()
+        abandoned = self.blockchain.rollback(fork_height)
+        adopted = self.apply_branch(branch) == len(branch) and self.blockchain.total_work() > previous_work
+        if not adopted:
+            Logger.error("Reorganization aborted: the new branch is invalid or has less work, restoring the local chain")
+            self.blockchain.rollback(fork_height)
+            self.apply_branch(abandoned)
+            self.reconcile_balances()
+            # The tip is unchanged, so the template and its view of the UTXO set stay valid
+            return False
+
+        # The abandoned blocks remain known as a side branch
+        self.tree.remove_side(branch)
+        work = self.blockchain.chain_work[fork_height - 1]
+        for height, block in enumerate(abandoned, fork_height):
+            work += block_work(block.target)
+            self.tree.add_side(block, height, work)
+        self.tree.prune(len(self.blockchain.chain) - 1)
+
+        # Ring balances and the wallet history follow the new tip
+        self.reconcile_balances()
+        self.refresh_wallet_history()
+
+        returned = [tx for block in abandoned for tx in block.transactions_list]
+        if self.current_block is not None:
+            returned.extend(self.current_block.transactions_list)
+        self.return_to_pending(returned)
+        self.temp_utxos = self.blockchain.UTXOs.overlay()
+
+        if self.pending_transactions:
+            self.new_transaction.set()
+            self.start_mining()
+        return True
+
+    def receive_block(self, block: Block):
+        """
+        Connects a block received from the network to the block tree.
+        A block extending the tip is appended. A block extending another known block is kept as a side
+        block and its branch is adopted once it has more cumulative work than the main chain. A block with
+        an unknown parent waits in the orphan pool and is connected as soon as its parent arrives; if the
+        parent does not arrive within ORPHAN_GRACE seconds the node synchronizes with its peers.
+        The hash and signatures of the block must have been checked. Must be called with processing_block_lock held.
+
+        :param block: The received Block.
+        """
+        pending = [block]
+        while pending:
+            block = pending.pop()
+            if self.blockchain.index.block_height(block.hash) is not None or block.hash in self.tree.side:
+                continue
+
+            parent = block.previous_hash
+            parent_height = self.blockchain.index.block_height(parent)
+            if parent == self.blockchain.chain[-1].hash:
+                if not block.validate_block(self.blockchain):
+                    Logger.warning("Rejected incoming block")
+                    continue
+                Logger.success("Adding it to the chain")
+                self.add_block_to_chain(block)
+                if self.blockchain.chain[-1] is not block:
+                    continue
+            elif parent_height is not None or parent in self.tree.side:
+                if parent_height is not None:
+                    height, work = parent_height + 1, self.blockchain.chain_work[parent_height]
+                else:
+                    _, height, work = self.tree.side[parent]
+                    height += 1
+                work += block_work(block.target)
+                self.tree.add_side(block, height, work)
+                Logger.info(f"Side block at height {height} stored")
+
+                if work > self.blockchain.total_work():
+                    fork_hash, branch = self.tree.branch(block.hash)
+                    fork_height = self.blockchain.index.block_height(fork_hash) + 1
+                    Logger.warning(f"Side branch has more work | Fork height: {fork_height} | Blocks: {len(branch)}")
+                    if not self.reorganize(fork_height, branch):
+                        self.tree.remove_side(branch)
+                        continue
+            else:
+                Logger.info("Orphan block buffered until its parent arrives")
+                self.tree.add_orphan(block)
+                if self.orphan_timer is None:
+                    self.orphan_timer = threading.Timer(ORPHAN_GRACE, self.check_orphans)
+                    self.orphan_timer.daemon = True
+                    self.orphan_timer.start()
+                continue
+
+            pending.extend(self.tree.pop_children(block.hash))
+        self.tree.prune(len(self.blockchain.chain) - 1)
+
+    def reconstruct_block(self, block: Block, short_ids, peer):
+        """
+        Completes a compact block with the transactions of the pending pool and the mining template, and of the
+        local blocks it competes with (the main chain blocks above the fork point of its branch and the side blocks).
+        Only the transactions not found locally are downloaded from the announcing peer, in one round trip.
+        If a short ID matched a different transaction, the merkle root in the header does not match and
+        all transactions are downloaded.
+
+        :param block: The announced Block, without transactions.
+        :param short_ids: The short IDs of its transactions, in block order.
+        :param peer: The ring entry of the announcing peer.
+        :return: The complete Block, or None if the transactions could not be obtained.
+        """
+        self.compact_stats['received'] += 1
+        with self.processing_block_lock:
+            with self.pending_lock:
+                candidates = list(self.pending_transactions)
+            if self.current_block is not None:
+                candidates.extend(self.current_block.transactions_list)
+            # Main chain blocks above the fork point of the branch the block extends (the tip if it is an orphan)
+            fork_hash = self.tree.branch(block.previous_hash)[0]
+            fork_height = self.blockchain.index.block_height(fork_hash)
+            if fork_height is None:
+                fork_height = len(self.blockchain.chain) - 2
+            for competing in self.blockchain.chain[fork_height + 1:]:
+                candidates.extend(competing.transactions_list)
+            for side, _, _ in self.tree.side.values():
+                candidates.extend(side.transactions_list)
+        pool = {tx.transaction_id[:SHORT_ID_SIZE]: tx for tx in candidates}
+
+        transactions = [pool.get(short_id) for short_id in short_ids]
+        missing = [position for position, tx in enumerate(transactions) if tx is None]
+        if not missing:
+            self.compact_stats['complete'] += 1
+        block.transactions_list = transactions
+        if missing or not block.has_valid_hash():
+            if not missing:
+                Logger.warning("Short ID collision in compact block, downloading all transactions")
+                missing = list(range(len(short_ids)))
+            fetched = fetch_block_transactions(self.transport, peer, block.hash, missing)
+            if fetched is None:
+                self.compact_stats['failed'] += 1
+                return None
+            self.compact_stats['transactions_fetched'] += len(fetched)
+            for position, tx in zip(missing, fetched):
+                transactions[position] = tx
+        return block
+
+    def check_orphans(self):
+        """
+        Synchronizes with the peers if orphans are still waiting for their parents after ORPHAN_GRACE seconds,
+        then connects the orphans whose parents became known.
+        """
+        with self.processing_block_lock:
+            self.orphan_timer = None
+            if not self.tree.orphans:
+                return
+            self.blockchain.resolve_conflict(self)
+            for parent in list(self.tree.children):
+                if self.blockchain.index.block_height(parent) is not None or parent in self.tree.side:
+                    for orphan in self.tree.pop_children(parent):
+                        self.receive_block(orphan)
+
+    def reconcile_balances(self):
+        """
+        Sets the ring balances to the balances of the UTXO set.
+        """
+        for entry in self.ring.values():
+            entry['balance'] = self.blockchain.UTXOs.balance(entry['id'])
+
+    def refresh_wallet_history(self):
+        """
+        Reloads the recent wallet transactions from the address index of the chain.
+        """
+        locations = self.blockchain.index.address_history(self.wallet.address, limit=self.wallet.transactions.maxlen)
+        self.wallet.transactions.clear()
+        self.wallet.transactions.extend(
+            self.blockchain.chain[height].transactions_list[position] for height, position in reversed(locations)
+        )
 
-        self.temp_utxos = deepcopy(self.blockchain.UTXOs)
-        self.update_pending_transactions(block)
-        self.dump.timestamp()
+    def return_to_pending(self, transactions):
+        """
+        Puts unconfirmed transactions back into the pool, ahead of the newer pending ones,
+        and drops pool entries confirmed by the current chain.
 
-        Logger.info(f"Chain height increased: {len(self.blockchain.chain)}")
-        with self.incoming_block_lock:
-            self.incoming_block = False
+        :param transactions: The transactions to return, oldest first.
+        """
+        with self.pending_lock:
+            queued = {tx.transaction_id for tx in self.pending_transactions}
+            for tx in reversed(transactions):
+                if tx.transaction_id not in self.blockchain.transactions_set and tx.transaction_id not in queued:
+                    self.pending_transactions.append(tx)
+                    self.pending_ids.add(tx.transaction_id)
+                    queued.add(tx.transaction_id)
+
+            self.pending_transactions = deque(
+                tx for tx in self.pending_transactions if tx.transaction_id not in self.blockchain.transactions_set
+            )
 
     # --- Networking: Common ---
 
     def create_transaction(self, receiver_address, amount):
         """
-        Creates, signs, and hashes a new transaction.
+        Creates and signs a new transaction. Its ID is part of the signed payload, so it is not changed afterwards.
 
-        :param receiver_address: The public key address of the recipient.
+        :param receiver_address: The address of the recipient.
         :param amount: The amount of NBC to transfer.
         :return: A signed and hashed Transaction instance.
         """
         tx = Transaction(self.wallet.address, self.wallet.private_key, receiver_address, amount)
         tx.sign_transaction(self.wallet.private_key)
-        tx.calculate_hash()
+        self.verifier.mark_verified(tx)
         return tx
 
     def broadcast_transaction(self, transaction):
         """
-        Broadcasts a transaction to all nodes in the ring.
+        Adds a transaction to the outgoing batch and returns immediately.
+        The batch is broadcast once it holds TX_BATCH_SIZE transactions or after TX_BATCH_WINDOW seconds.
 
         :param transaction: The Transaction instance to broadcast.
         """
-        for node in self.ring.values():
-            if node['id'] != self.id:
-                url = f"http://{node['ip']}:{node['port']}/transactions/receive"
-                try:
-                    requests.post(url, data=pickle.dumps(transaction), timeout=5)
-                except requests.exceptions.RequestException:
-                    Logger.error(f"Network Error: Could not broadcast TX to Node {node['id']}")
+        self.outgoing_transactions.add(transaction)
 
-    def unicast_block(self, node, block):
+    def broadcast_transactions(self, transactions, ttl=None, exclude=None):
         """
-        Sends a block to a single node.
+        Queues a batch of transactions to the outbound workers of all nodes in the ring,
+        or of GOSSIP_FANOUT random nodes when gossiping.
 
-        :param node: The node dictionary.
-        :param block: The Block object.
+        :param transactions: The list of Transaction instances.
+        :param ttl: The remaining hops, GOSSIP_TTL for new transactions.
+        :param exclude: The ID of the node the transactions were received from.
         """
-        url = f"http://{node['ip']}:{node['port']}/blocks/receive"
-        try:
-            requests.post(url, data=pickle.dumps(block), timeout=5)
-        except requests.exceptions.RequestException as e:
-            Logger.error(f"Failed to unicast block to Node {node.get('id', '?')}, because of: {e}")
+        ttl = self.gossip.ttl if ttl is None else ttl
+        data = encode(TRANSACTIONS, transactions)
+        peers = [node for node in self.ring.values() if node['id'] not in (self.id, exclude)]
+        for node in self.gossip.targets(peers):
+            self.transport.send(node, f'/transactions/receive/batch?peer={self.id}', data,
+                                f"batch of {len(transactions)} TXs", {TTL_HEADER: str(ttl)})
 
-    def broadcast_block(self, block: Block):
+    def broadcast_block(self, block: Block, ttl=None, exclude=None):
         """
-        Sends a newly mined block to all other nodes in the ring.
+        Queues a block to the outbound workers of all other nodes in the ring (or of GOSSIP_FANOUT random nodes
+        when gossiping) and returns immediately, so the miner does not hold processing_block_lock while peers
+        are contacted.
 
         :param block: The Block instance to broadcast.
-        """
-        for node in self.ring.values():
-            if node['id'] != self.id:
-                self.unicast_block(node, block)
+        :param ttl: The remaining hops, GOSSIP_TTL for a newly mined block.
+        :param exclude: The ID of the node the block was received from.
+        """
+        ttl = self.gossip.ttl if ttl is None else ttl
+        self.gossip.seen.add(block.hash)
+        # Transactions still waiting for their batch are sent first
+        self.outgoing_transactions.flush()
+        if COMPACT_BLOCKS:
+            path, data = f'/blocks/receive/compact?peer={self.id}', encode(COMPACT_BLOCK, block)
+        else:
+            path, data = f'/blocks/receive?peer={self.id}', encode(BLOCK, block)
+        peers = [node for node in self.ring.values() if node['id'] not in (self.id, exclude)]
+        for node in self.gossip.targets(peers):
+            self.transport.send(node, path, data, 'block', {TTL_HEADER: str(ttl)})
 
     # --- Networking: Bootstrap & Initialization ---
 
@@ -341,12 +741,11 @@ class Node:
 
         :param node: The bootstrap node dictionary containing IP and port.
         """
-        url = f"http://{node['ip']}:{node['port']}/nodes/register"
         try:
-            response = requests.post(url, data={
+            response = self.transport.post(node, '/nodes/register', data={
                 'ip': self.ip,
                 'port': self.port,
-                'address': self.wallet.address
+                'public_key': self.wallet.public_key_pem
             })
             if response.status_code == 200:
                 self.id = response.json()['id']
@@ -356,18 +755,17 @@ class Node:
         except requests.exceptions.RequestException as e:
             Logger.error(f"Connection error to Bootstrap node: {e}")
 
-    def add_node_to_ring(self, id, ip, port, address, balance):
+    def add_node_to_ring(self, id, ip, port, public_key, balance):
         """
         Adds a new node's metadata to the local ring.
 
         :param id: Numeric ID of the node.
         :param ip: IP address.
         :param port: Listening port.
-        :param address: Wallet public key.
+        :param public_key: Wallet public key (PEM), the address is derived from it.
         :param balance: Initial balance.
         """
-        self.ring[str(address)] = {'id': id, 'ip': ip, 'port': port, 'balance': balance}
-        self.blockchain.UTXOs.append(deque())
+        self.ring.add(id, ip, port, public_key, balance)
         Logger.success(f"Node {id} synchronized to ring.")
 
     def unicast_ring(self, node):
@@ -376,9 +774,8 @@ class Node:
 
         :param node: The target node dictionary.
         """
-        url = f"http://{node['ip']}:{node['port']}/ring/receive"
         try:
-            requests.post(url, data=pickle.dumps(self.ring))
+            self.transport.post(node, '/ring/receive', data=encode(RING, self.ring))
         except requests.exceptions.RequestException:
             Logger.error(f"Failed to send ring to Node {node.get('id', 'Unknown')}")
 
@@ -397,9 +794,8 @@ class Node:
 
         :param node: The target node dictionary.
         """
-        url = f"http://{node['ip']}:{node['port']}/blockchain/receive"
         try:
-            requests.post(url, data=pickle.dumps(self.blockchain))
+            self.transport.post(node, '/blockchain/receive', data=encode(CHAIN, self.blockchain))
         except requests.exceptions.RequestException:
             Logger.error(f"Failed to send blockchain to Node {node.get('id', 'Unknown')}")
 
@@ -407,7 +803,7 @@ class Node:
         """
         (Bootstrap Only) Broadcasts the current blockchain state to all peers.
         """
-        self.temp_utxos = deepcopy(self.blockchain.UTXOs)
+        self.temp_utxos = self.blockchain.UTXOs.overlay()
         for node in self.ring.values():
             if node['id'] != self.id:
                 self.unicast_blockchain(node)
@@ -417,13 +813,13 @@ class Node:
         """
         Creates and broadcasts an initial transaction of 100 NBC to a specific node.
 
-        :param node_address: The public address of the recipient node.
+        :param node_address: The address of the recipient node.
         """
         # Create initial transaction (100 noobcoins)
         transaction = self.create_transaction(node_address, 100)
-        self.add_transaction_to_pending(transaction)
         self.broadcast_transaction(transaction)
-        Logger.network(f"Initial 100 NBC sent to Node Address {str(node_address)[:10]}...")
+        self.add_transaction_to_pending(transaction)
+        Logger.network(f"Initial 100 NBC sent to Node Address {node_address}")
 
     def broadcast_initial_nbc(self):
         """
@@ -442,7 +838,7 @@ class Node:
         """
         tx_strings = []
         for tx in transactions:
-            sender_id = self.ring[str(tx.sender_address)]['id']
-            receiver_id = self.ring[str(tx.receiver_address)]['id']
+            sender_id = self.ring[tx.sender_address]['id']
+            receiver_id = self.ring[tx.receiver_address]['id']
             tx_strings.append(f"({sender_id} -> {receiver_id}: {tx.amount} NBC)")
         return ", ".join(tx_strings)
\ No newline at end of file
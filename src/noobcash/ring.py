@@ -0,0 +1,100 @@
+import hashlib
+
+from src.noobcash.signatures import import_public_key
+
+FINGERPRINT_LENGTH = 16  # Hex characters (64 bits) of the SHA256 of the public key
+
+
+def fingerprint(public_key: str):
+    """
+    Derive the short wallet address from a PEM encoded public key.
+
+    :param public_key: The PEM encoded public key.
+    :return: The address (hex fingerprint).
+    """
+    return hashlib.sha256(public_key.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+class Ring:
+
+    def __init__(self):
+        """
+        Initialize an empty membership table.
+        Every member is an entry {id, ip, port, address, public_key, balance}, reachable in O(1)
+        by node id and by address. Parsed public keys are cached per address.
+        """
+        self.nodes = []         # Entries indexed by node id
+        self.addresses = {}     # {address: entry}
+        self.keys = {}          # {address: parsed public key}, rebuilt lazily after unpickling
+
+    def add(self, id, ip, port, public_key, balance):
+        """
+        Add a member to the table. Its address is derived from the public key.
+
+        :param id: Numeric ID of the node.
+        :param ip: IP address.
+        :param port: Listening port.
+        :param public_key: PEM encoded wallet public key.
+        :param balance: Initial balance.
+        :return: The new entry.
+        """
+        entry = {
+            'id': id,
+            'ip': ip,
+            'port': port,
+            'address': fingerprint(public_key),
+            'public_key': public_key,
+            'balance': balance
+        }
+
+        while len(self.nodes) <= id:
+            self.nodes.append(None)
+        self.nodes[id] = entry
+        self.addresses[entry['address']] = entry
+        return entry
+
+    def by_id(self, id):
+        """
+        Returns the entry of the node with the given id.
+
+        :param id: Numeric ID of the node.
+        :return: The entry, or None if unknown.
+        """
+        return self.nodes[id] if 0 <= id < len(self.nodes) else None
+
+    def public_key(self, address):
+        """
+        Returns the parsed public key of a member.
+
+        :param address: The member's address.
+        :return: The public key object.
+        """
+        key = self.keys.get(address)
+        if key is None:
+            key = import_public_key(self.addresses[address]['public_key'])
+            self.keys[address] = key
+        return key
+
+    def values(self):
+        """
+        Returns all entries ordered by node id.
+        """
+        return [entry for entry in self.nodes if entry is not None]
+
+    def __getitem__(self, address):
+        return self.addresses[address]
+
+    def __contains__(self, address):
+        return address in self.addresses
+
+    def __iter__(self):
+        return iter([entry['address'] for entry in self.values()])
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __getstate__(self):
+        # Parsed keys are process local and not sent over the network
+        state = self.__dict__.copy()
+        state['keys'] = {}
+        return state
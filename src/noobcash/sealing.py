@@ -0,0 +1,42 @@
+import time
+
+
+class SealingPolicy:
+
+    def __init__(self, min_size: int, max_size: int, max_wait: float):
+        """
+        Initialize a block sealing policy.
+        A block template is sealed (Proof-of-Work starts) when it holds max_size transactions,
+        or when it holds at least min_size transactions and its first transaction waited max_wait seconds.
+
+        :param min_size: The minimum number of transactions per block.
+        :param max_size: The maximum number of transactions per block.
+        :param max_wait: The maximum number of seconds a transaction waits in the template before sealing.
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_wait = max_wait
+
+    def should_seal(self, size: int, opened_at: float):
+        """
+        Check if the block template has to be sealed now.
+
+        :param size: The number of transactions in the template.
+        :param opened_at: The time the first transaction entered the template.
+        :return: True if mining should start, False if the template should wait for more transactions.
+        """
+        if size >= self.max_size:
+            return True
+        return size >= self.min_size and time.time() - opened_at >= self.max_wait
+
+    def remaining(self, size: int, opened_at: float):
+        """
+        Returns how long the template may still wait for transactions.
+
+        :param size: The number of transactions in the template.
+        :param opened_at: The time the first transaction entered the template.
+        :return: The remaining seconds, or None if the template is below the minimum size and can only wait for transactions.
+        """
+        if size < self.min_size:
+            return None
+        return max(0.0, self.max_wait - (time.time() - opened_at))
@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+from functools import lru_cache
+import os
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import ECC, RSA
+from Crypto.Signature import DSS, PKCS1_v1_5, eddsa
+
+load_dotenv()
+SIGNATURE_SCHEME = os.getenv('SIGNATURE_SCHEME', 'rsa')
+
+
+class SignatureScheme(ABC):
+    """
+    Interface of a signature scheme. All nodes of a network must use the same scheme.
+    """
+    name = None
+
+    @abstractmethod
+    def generate(self):
+        """
+        Generate a new private key.
+
+        :return: The private key object.
+        """
+
+    @abstractmethod
+    def export_public_key(self, private_key):
+        """
+        Export the public key belonging to a private key.
+
+        :param private_key: The private key object.
+        :return: The PEM encoded public key.
+        """
+
+    @abstractmethod
+    def export_private_key(self, private_key):
+        """
+        Export a private key so the wallet survives a restart.
+
+        :param private_key: The private key object.
+        :return: The PEM encoded private key.
+        """
+
+    @abstractmethod
+    def import_private_key(self, private_key: str):
+        """
+        Parse a PEM encoded private key.
+
+        :param private_key: The PEM encoded private key.
+        :return: The private key object.
+        """
+
+    @abstractmethod
+    def import_public_key(self, public_key: str):
+        """
+        Parse a PEM encoded public key.
+
+        :param public_key: The PEM encoded public key.
+        :return: The public key object.
+        """
+
+    @abstractmethod
+    def sign(self, private_key, payload: bytes):
+        """
+        Sign a payload.
+
+        :param private_key: The private key object.
+        :param payload: The bytes to sign.
+        :return: The signature bytes.
+        """
+
+    @abstractmethod
+    def verify(self, public_key, payload: bytes, signature: bytes):
+        """
+        Verify a signature over a payload.
+
+        :param public_key: The public key object.
+        :param payload: The signed bytes.
+        :param signature: The signature to check.
+        :return: True if the signature is valid, False otherwise.
+        """
+
+
+class RSAScheme(SignatureScheme):
+    """
+    2048-bit RSA with PKCS#1 v1.5 over SHA256. Kept for compatibility.
+    """
+    name = 'rsa'
+
+    def generate(self):
+        return RSA.generate(2048)
+
+    def export_public_key(self, private_key):
+        return private_key.publickey().exportKey().decode()
+
+    def export_private_key(self, private_key):
+        return private_key.export_key().decode()
+
+    def import_private_key(self, private_key: str):
+        return RSA.import_key(private_key)
+
+    def import_public_key(self, public_key: str):
+        return RSA.importKey(public_key)
+
+    def sign(self, private_key, payload: bytes):
+        return PKCS1_v1_5.new(private_key).sign(SHA256.new(payload))
+
+    def verify(self, public_key, payload: bytes, signature: bytes):
+        # The PKCS1_v1_5 module returns False for an invalid signature
+        return PKCS1_v1_5.new(public_key).verify(SHA256.new(payload), signature)
+
+
+class Ed25519Scheme(SignatureScheme):
+    """
+    Ed25519 (RFC 8032). Fast key generation, signing and verification with 64-byte signatures.
+    """
+    name = 'ed25519'
+
+    def generate(self):
+        return ECC.generate(curve='ed25519')
+
+    def export_public_key(self, private_key):
+        return private_key.public_key().export_key(format='PEM')
+
+    def export_private_key(self, private_key):
+        return private_key.export_key(format='PEM')
+
+    def import_private_key(self, private_key: str):
+        return ECC.import_key(private_key)
+
+    def import_public_key(self, public_key: str):
+        return ECC.import_key(public_key)
+
+    def sign(self, private_key, payload: bytes):
+        return eddsa.new(private_key, 'rfc8032').sign(payload)
+
+    def verify(self, public_key, payload: bytes, signature: bytes):
+        try:
+            eddsa.new(public_key, 'rfc8032').verify(payload, signature)
+            return True
+        except ValueError:
+            return False
+
+
+class ECDSAScheme(SignatureScheme):
+    """
+    ECDSA on NIST P-256 over SHA256 with 64-byte signatures.
+    """
+    name = 'ecdsa'
+
+    def generate(self):
+        return ECC.generate(curve='P-256')
+
+    def export_public_key(self, private_key):
+        return private_key.public_key().export_key(format='PEM')
+
+    def export_private_key(self, private_key):
+        return private_key.export_key(format='PEM')
+
+    def import_private_key(self, private_key: str):
+        return ECC.import_key(private_key)
+
+    def import_public_key(self, public_key: str):
+        return ECC.import_key(public_key)
+
+    def sign(self, private_key, payload: bytes):
+        return DSS.new(private_key, 'fips-186-3').sign(SHA256.new(payload))
+
+    def verify(self, public_key, payload: bytes, signature: bytes):
+        try:
+            DSS.new(public_key, 'fips-186-3').verify(SHA256.new(payload), signature)
+            return True
+        except ValueError:
+            return False
+
+
+SCHEMES = {scheme.name: scheme for scheme in (RSAScheme(), Ed25519Scheme(), ECDSAScheme())}
+
+
+def get_scheme(name: str = SIGNATURE_SCHEME):
+    """
+    Returns the signature scheme with the given name (SIGNATURE_SCHEME by default).
+
+    :param name: The scheme name: 'rsa', 'ed25519' or 'ecdsa'.
+    :return: The SignatureScheme instance.
+    """
+    try:
+        return SCHEMES[name]
+    except KeyError:
+        raise ValueError(f"Unknown signature scheme: {name}")
+
+
+@lru_cache(maxsize=1024)
+def import_public_key(public_key: str):
+    """
+    Parse a wallet public key with the configured scheme, cached so every key is only parsed once per process.
+
+    :param public_key: The PEM encoded public key.
+    :return: The public key object.
+    """
+    return get_scheme().import_public_key(public_key)
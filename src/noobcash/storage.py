@@ -0,0 +1,183 @@
+import mmap
+import os
+import pickle
+import struct
+
+SEGMENT_FILE = 'blocks.dat'         # Append-only segment of serialized blocks
+INDEX_FILE = 'blocks.idx'           # Fixed-size index records, one per height
+SNAPSHOT_FILE = 'utxo.snapshot'     # Latest UTXO snapshot
+STATE_FILE = 'node.state'           # Identity of the node: id, wallet key and ring
+
+RECORD_LENGTH = struct.Struct('<I')
+# Index record: offset of the block record in the segment, its length and the block hash
+INDEX_ENTRY = struct.Struct('<QI32s')
+# Snapshot header: number of applied blocks and hash of the last one, followed by the pickled UTXO set
+SNAPSHOT_HEADER = struct.Struct('<Q32s')
+
+
+def _write_atomic(path, data: bytes):
+    """
+    Replace a file with new content so that a crash leaves either the old or the new version.
+
+    :param path: The file to write.
+    :param data: The new content.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read(path, size=-1):
+    """
+    Read a file written by _write_atomic().
+
+    :param path: The file to read.
+    :param size: The number of bytes to read (all by default).
+    :return: The content, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+class BlockStore:
+
+    def __init__(self, path: str, snapshot_interval: int):
+        """
+        Open (or create) the on-disk block store of a node.
+        Blocks are appended with their undo record to a segment file. A memory-mapped index of
+        fixed-size records locates the block of every height in O(1). A torn record left by a crash
+        is dropped on open.
+
+        :param path: The data directory of the node.
+        :param snapshot_interval: Blocks between two UTXO snapshots (0 disables snapshots).
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.segment = open(os.path.join(path, SEGMENT_FILE), 'a+b')
+        self.index = open(os.path.join(path, INDEX_FILE), 'a+b')
+        self.index_map = None
+        self.height = os.fstat(self.index.fileno()).st_size // INDEX_ENTRY.size
+
+        # Drop index records whose block was not completely written
+        segment_size = os.fstat(self.segment.fileno()).st_size
+        while self.height and sum(self.entry(self.height - 1)[:2]) > segment_size:
+            self.height -= 1
+        self.truncate(self.height)
+
+    def _map(self):
+        """
+        Map the index file, remapping it when it grew since the last mapping.
+        """
+        size = self.height * INDEX_ENTRY.size
+        if self.index_map is None or len(self.index_map) < size:
+            self._unmap()
+            self.index_map = mmap.mmap(self.index.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.index_map
+
+    def _unmap(self):
+        if self.index_map is not None:
+            self.index_map.close()
+            self.index_map = None
+
+    def entry(self, height: int):
+        """
+        Returns the index record of a height.
+
+        :param height: The block height.
+        :return: An (offset, length, block hash) tuple.
+        """
+        return INDEX_ENTRY.unpack_from(self._map(), height * INDEX_ENTRY.size)
+
+    def append(self, block, undo):
+        """
+        Append a block and its undo record. The segment is written before the index,
+        so a crash never leaves an index record pointing to a partial block.
+
+        :param block: The Block to store.
+        :param undo: The (spent UTXOs, created UTXOs) record of the block.
+        """
+        data = pickle.dumps((block, undo))
+        self.segment.seek(0, os.SEEK_END)
+        offset = self.segment.tell()
+        self.segment.write(RECORD_LENGTH.pack(len(data)) + data)
+        self.segment.flush()
+
+        block_hash = bytes.fromhex(block.hash) if isinstance(block.hash, str) else bytes(32)
+        self.index.write(INDEX_ENTRY.pack(offset, RECORD_LENGTH.size + len(data), block_hash))
+        self.index.flush()
+        self.height += 1
+
+    def read(self, height: int):
+        """
+        Read the block stored at a height.
+
+        :param height: The block height.
+        :return: A (block, undo record) tuple.
+        """
+        offset, length, _ = self.entry(height)
+        self.segment.seek(offset + RECORD_LENGTH.size)
+        return pickle.loads(self.segment.read(length - RECORD_LENGTH.size))
+
+    def truncate(self, height: int):
+        """
+        Remove the blocks above a height (used on reorganizations).
+        A snapshot taken above the new height is deleted.
+
+        :param height: The number of blocks to keep.
+        """
+        offset = sum(self.entry(height - 1)[:2]) if height else 0
+        self._unmap()
+        self.index.truncate(height * INDEX_ENTRY.size)
+        self.segment.truncate(offset)
+        self.height = height
+
+        header = _read(os.path.join(self.path, SNAPSHOT_FILE), SNAPSHOT_HEADER.size)
+        if header is not None and SNAPSHOT_HEADER.unpack(header)[0] > height:
+            os.remove(os.path.join(self.path, SNAPSHOT_FILE))
+
+    def save_snapshot(self, height: int, utxos):
+        """
+        Write the UTXO set at a height.
+
+        :param height: The number of blocks applied to the UTXO set.
+        :param utxos: The UTXOSet.
+        """
+        _write_atomic(
+            os.path.join(self.path, SNAPSHOT_FILE),
+            SNAPSHOT_HEADER.pack(height, self.entry(height - 1)[2]) + pickle.dumps(utxos)
+        )
+
+    def load_snapshot(self):
+        """
+        Read the latest UTXO snapshot if it matches the stored chain.
+
+        :return: A (height, UTXOSet) tuple, or None.
+        """
+        data = _read(os.path.join(self.path, SNAPSHOT_FILE))
+        if data is None:
+            return None
+        height, block_hash = SNAPSHOT_HEADER.unpack_from(data)
+        if not 0 < height <= self.height or block_hash != self.entry(height - 1)[2]:
+            return None
+        return height, pickle.loads(data[SNAPSHOT_HEADER.size:])
+
+    def save_state(self, state: dict):
+        """
+        Persist the identity of the node.
+
+        :param state: A dictionary with the node id, wallet private key and ring.
+        """
+        _write_atomic(os.path.join(self.path, STATE_FILE), pickle.dumps(state))
+
+    def load_state(self):
+        """
+        Returns the persisted identity of the node, or None for a new node.
+        """
+        data = _read(os.path.join(self.path, STATE_FILE))
+        return None if data is None else pickle.loads(data)
@@ -0,0 +1,190 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import hashlib
+import os
+
+import requests
+
+from src.noobcash.block import HEADER_NONCE, HEADER_PREFIX
+from src.noobcash.transport import PeerTransport
+from src.noobcash.wire import BLOCKS, TRANSACTIONS, WireError, decode
+from src.utils.logger import Logger
+
+load_dotenv()
+SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', 100))  # Blocks per ranged download
+MAX_HEADERS = 2000  # Headers returned per /blocks/headers request
+
+
+def fetch_length(transport: PeerTransport, peer):
+    """
+    Query the chain length and cumulative work of a peer.
+
+    :param transport: The PeerTransport of the node.
+    :param peer: The ring entry of the peer.
+    :return: A (chain length, chain work) tuple, (0, 0) if the peer is unreachable.
+    """
+    try:
+        response = transport.get(peer, '/blockchain/length')
+        if response.status_code == 200:
+            data = response.json()
+            return data.get('chain_length', 0), int(data.get('chain_work', '0'), 16)
+    except requests.exceptions.RequestException:
+        Logger.error(f"Consensus Error: Could not reach Node {peer['id']}")
+    return 0, 0
+
+
+def fetch_lengths(transport: PeerTransport, peers):
+    """
+    Query the chain lengths and cumulative work of all peers in parallel.
+
+    :param transport: The PeerTransport of the node.
+    :param peers: The ring entries of the peers.
+    :return: A list of (peer, chain length, chain work) tuples.
+    """
+    if not peers:
+        return []
+    with ThreadPoolExecutor(max_workers=len(peers)) as executor:
+        results = executor.map(lambda peer: fetch_length(transport, peer), peers)
+        return [(peer, length, work) for peer, (length, work) in zip(peers, results)]
+
+
+def verify_headers(previous_hash, headers):
+    """
+    Check that a sequence of headers links to a block and that every header hashes to its
+    block hash and meets its own proof-of-work target.
+
+    :param previous_hash: The hash of the block the first header must point to.
+    :param headers: The header dictionaries {'hash', 'header'} returned by /blocks/headers.
+    :return: True if the header chain is valid, False otherwise.
+    """
+    for entry in headers:
+        raw = bytes.fromhex(entry['header'])
+        if len(raw) != HEADER_PREFIX.size + HEADER_NONCE.size:
+            return False
+        _, prev, _, target, _ = HEADER_PREFIX.unpack_from(raw)
+        digest = hashlib.sha256(raw).digest()
+        if prev.hex() != previous_hash or digest.hex() != entry['hash'] or \
+                int.from_bytes(digest, 'big') > int.from_bytes(target, 'big'):
+            return False
+        previous_hash = entry['hash']
+    return True
+
+
+def fetch_headers(transport: PeerTransport, peer, blockchain):
+    """
+    Download the headers of a peer's chain after the fork point with the local chain.
+    The fork point is found by the peer from a block locator, so only the missing headers are transferred.
+
+    :param transport: The PeerTransport of the node.
+    :param peer: The ring entry of the peer.
+    :param blockchain: The local Blockchain.
+    :return: A (fork height, list of verified headers) tuple, or None on failure.
+    """
+    locator = blockchain.block_locator()
+    fork_height, headers = None, []
+    while True:
+        try:
+            response = transport.get(peer, '/blocks/headers', params={
+                'locator': ','.join(f"{height}:{block_hash}" for height, block_hash in locator),
+                'limit': MAX_HEADERS
+            })
+        except requests.exceptions.RequestException:
+            Logger.error(f"Failed to download headers from Node {peer['id']}")
+            return None
+        if response.status_code != 200:
+            return None
+        page = response.json()
+        if fork_height is None:
+            fork_height = page['start']
+            if fork_height == 0:
+                return 0, []
+            previous_hash = blockchain.chain[fork_height - 1].hash
+        elif page['start'] != fork_height + len(headers):
+            return None  # The peer switched branches while we were downloading
+
+        if not verify_headers(previous_hash, page['headers']):
+            Logger.error(f"Invalid headers from Node {peer['id']}")
+            return None
+        headers.extend(page['headers'])
+        if len(page['headers']) < MAX_HEADERS:
+            return fork_height, headers
+
+        previous_hash = headers[-1]['hash']
+        locator = [(fork_height + len(headers) - 1, previous_hash)]
+
+
+def fetch_range(transport: PeerTransport, peer, start, end):
+    """
+    Download the blocks [start, end) of a peer's chain.
+
+    :param transport: The PeerTransport of the node.
+    :param peer: The ring entry of the peer.
+    :param start: The first height.
+    :param end: The height after the last block.
+    :return: The list of blocks, or None on failure.
+    """
+    try:
+        response = transport.get(peer, '/blocks', params={'from': start, 'to': end})
+        if response.status_code == 200:
+            return decode(response.content, BLOCKS)
+    except WireError as e:
+        Logger.error(f"Malformed blocks {start}-{end} from Node {peer['id']}: {e}")
+    except requests.exceptions.RequestException:
+        Logger.error(f"Failed to download blocks {start}-{end} from Node {peer['id']}")
+    return None
+
+
+def fetch_block_transactions(transport: PeerTransport, peer, block_hash, indexes):
+    """
+    Download selected transactions of a block a peer announced, to complete a compact block.
+
+    :param transport: The PeerTransport of the node.
+    :param peer: The ring entry of the peer.
+    :param block_hash: The hash of the block.
+    :param indexes: The positions of the transactions in the block.
+    :return: The list of transactions in the order of the indexes, or None on failure.
+    """
+    try:
+        response = transport.get(peer, f'/blocks/{block_hash}/transactions',
+                                 params={'indexes': ','.join(map(str, indexes))})
+        if response.status_code == 200:
+            transactions = decode(response.content, TRANSACTIONS)
+            if len(transactions) == len(indexes):
+                return transactions
+    except WireError as e:
+        Logger.error(f"Malformed transactions of block {block_hash[:7]} from Node {peer['id']}: {e}")
+    except requests.exceptions.RequestException:
+        Logger.error(f"Failed to download transactions of block {block_hash[:7]} from Node {peer['id']}")
+    return None
+
+
+def fetch_blocks(transport: PeerTransport, peers, fork_height, headers):
+    """
+    Download the blocks of a verified header chain in SYNC_BATCH_SIZE ranges, spread over several peers in parallel.
+    A range whose blocks do not match the headers is retried with the next peer.
+
+    :param transport: The PeerTransport of the node.
+    :param peers: The ring entries of peers whose chain contains the headers, best first.
+    :param fork_height: The height of the first header.
+    :param headers: The verified headers.
+    :return: The list of blocks, oldest first, or None if a range could not be downloaded.
+    """
+    ranges = [(start, min(start + SYNC_BATCH_SIZE, fork_height + len(headers)))
+              for start in range(fork_height, fork_height + len(headers), SYNC_BATCH_SIZE)]
+
+    def download(job):
+        number, (start, end) = job
+        for attempt in range(len(peers)):
+            peer = peers[(number + attempt) % len(peers)]
+            blocks = fetch_range(transport, peer, start, end)
+            if blocks is not None and [block.hash for block in blocks] == \
+                    [entry['hash'] for entry in headers[start - fork_height:end - fork_height]]:
+                return blocks
+        return None
+
+    with ThreadPoolExecutor(max_workers=min(len(peers), len(ranges)) or 1) as executor:
+        results = list(executor.map(download, enumerate(ranges)))
+
+    if any(blocks is None for blocks in results):
+        return None
+    return [block for blocks in results for block in blocks]
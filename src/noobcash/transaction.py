@@ -1,41 +1,53 @@
-import json
+import hashlib
+import struct
 
 import Crypto
 import Crypto.Random
-from Crypto.Signature import PKCS1_v1_5
-from Crypto.Hash import SHA256
-from Crypto.PublicKey import RSA
+from src.noobcash.signatures import get_scheme, import_public_key
 from src.utils.logger import Logger
 
+NONCE_SIZE = 8  # Random bytes that distinguish otherwise identical transfers
+AMOUNT = struct.Struct('<d')
+LENGTH = struct.Struct('<H')
+
 
 class Transaction:
+    __slots__ = ('sender_address', 'receiver_address', 'amount', 'signature', 'nonce', 'transaction_id')
 
     def __init__(self, sender_address, sender_private_key, receiver_address, value):
         """
         Initialize a new transaction.
 
-        :param sender_address: The public key of the wallet sending the money.
+        :param sender_address: The address (public key fingerprint) of the wallet sending the money.
         :param sender_private_key: The private key of the sender (unused in init).
-        :param receiver_address: The public key of the wallet receiving the money.
+        :param receiver_address: The address (public key fingerprint) of the wallet receiving the money.
         :param value: The amount to be transferred.
         """
-        self.sender_address = sender_address        # Sender's public key
-        self.receiver_address = receiver_address    # Receiver's public key
+        self.sender_address = sender_address        # Sender's address
+        self.receiver_address = receiver_address    # Receiver's address
         self.amount = value                         # Amount to transfer
-        self.transaction_inputs = None              # List of Transaction Inputs
-        self.transaction_outputs = None             # List of Transaction Outputs
         self.signature = None                       # Signature of the transaction
-        self.transaction_id = self.calculate_hash() # Transaction hash
+        self.nonce = Crypto.Random.get_random_bytes(NONCE_SIZE)  # Makes repeated identical transfers distinct
+        self.transaction_id = self.calculate_hash() # Transaction hash (32 bytes)
 
     def calculate_hash(self):
         """
         Calculate hash of transaction and use it as its ID.
+        The ID is the SHA256 of the canonical signed payload, so identical resubmissions have the same ID.
 
-        :return: The calculated transaction ID (hash).
+        :return: The calculated transaction ID (32 raw bytes).
         """
-        self.transaction_id = Crypto.Random.get_random_bytes(128).decode("ISO-8859-1")
+        self.transaction_id = hashlib.sha256(self.get_sign_payload()).digest()
         return self.transaction_id
 
+    def has_valid_id(self):
+        """
+        Check that the transaction ID matches the content of the transaction.
+
+        :return: True if the ID is the hash of the signed payload, False otherwise.
+        """
+        return self.transaction_id == hashlib.sha256(self.get_sign_payload()).digest()
+
     def to_dict(self):
         """
         Convert transaction object to dictionary for readability.
@@ -47,8 +59,6 @@ class Transaction:
             "receiver_address": self.receiver_address,
             "amount": self.amount,
             "transaction_id": self.transaction_id,
-            "transaction_inputs": self.transaction_inputs,
-            "transaction_outputs": self.transaction_outputs,
             "signature": self.signature
         }
         return data
@@ -56,56 +66,66 @@ class Transaction:
 
     def get_sign_payload(self):
         """
-        Prepare the payload for signing the transaction.
+        Prepare the canonical payload for signing and hashing the transaction:
+        length-prefixed sender and receiver addresses, the amount as a double and the nonce.
+
+        :return: The payload bytes.
         """
-        return json.dumps({
-            "sender": str(self.sender_address),
-            "receiver": str(self.receiver_address),
-            "amount": float(self.amount),
-            "id": str(self.transaction_id)
-        }, sort_keys=True)  # sort_keys is vital for consistent hashing
+        sender = str(self.sender_address).encode('utf-8')
+        receiver = str(self.receiver_address).encode('utf-8')
+        return b''.join((
+            LENGTH.pack(len(sender)), sender,
+            LENGTH.pack(len(receiver)), receiver,
+            AMOUNT.pack(float(self.amount)),
+            self.nonce
+        ))
 
     def sign_transaction(self, private_key):
         """
         Sign the transaction with the sender's private key.
 
-        :param private_key: The RSA private key of the sender.
+        :param private_key: The private key of the sender (of the configured signature scheme).
         """
-        payload = self.get_sign_payload()
-        h = SHA256.new(payload.encode('utf-8'))
-        signer = PKCS1_v1_5.new(private_key)
-        self.signature = signer.sign(h)
+        self.signature = get_scheme().sign(private_key, self.get_sign_payload())
 
-    def verify_signature(self):
+    @staticmethod
+    def verify_payload(public_key, payload, signature):
         """
-        Verify the transaction signature using the sender's public key.
+        Verify a signature over a payload with the sender's public key.
+
+        :param public_key: The public key of the sender, parsed or PEM encoded.
+        :param payload: The signed payload bytes.
+        :param signature: The signature to check.
+        :return: True if the signature is valid, False otherwise.
         """
-        if not self.signature:
+        if not signature:
             return False
         try:
-            payload = self.get_sign_payload()
-            h = SHA256.new(payload.encode('utf-8'))
-            public_key = RSA.importKey(self.sender_address)
-            verifier = PKCS1_v1_5.new(public_key)
-
-            # In PKCS1_v1_5, verify() raises an exception if invalid
-            verifier.verify(h, self.signature)
-            return True
+            if isinstance(public_key, str):
+                public_key = import_public_key(public_key)
+            return get_scheme().verify(public_key, payload, signature)
         except (ValueError, TypeError):
             return False
 
-    def validate_transaction(self, utxo_id, utxos):
+    def verify_signature(self, public_key):
+        """
+        Verify the transaction signature using the sender's public key.
+
+        :param public_key: The public key registered for the sender's address.
+        """
+        return Transaction.verify_payload(public_key, self.get_sign_payload(), self.signature)
+
+    def validate_transaction(self, utxo_id, utxos, verifier):
         """
         Verify signature of sender and verify sender has enough amount to spend.
 
-        :param utxo_id: The identifier (address) to check in UTXOs.
-        :param utxos: The dictionary of Unspent Transaction Outputs.
+        :param utxo_id: The node ID of the sender in the UTXO set.
+        :param utxos: The UTXOSet to check the balance against.
+        :param verifier: The SignatureVerifier whose cache is used instead of verifying again.
         :return: True if transaction is valid, False otherwise.
         """
-        balance = 0
-        for utxo in utxos[utxo_id]:
-            balance += utxo.amount
-        if not self.verify_signature():
+        balance = utxos.balance(utxo_id)
+        if not verifier.verify(self):
             Logger.error("Transaction NOT Validated: Not valid address")
             return False
         elif balance < self.amount:
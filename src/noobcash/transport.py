@@ -0,0 +1,235 @@
+from dotenv import load_dotenv
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.logger import Logger
+
+load_dotenv()
+PEER_POOL_SIZE = int(os.getenv('PEER_POOL_SIZE', 4))  # Keep-alive connections per peer
+PEER_CONNECT_TIMEOUT = float(os.getenv('PEER_CONNECT_TIMEOUT', 3))
+PEER_READ_TIMEOUT = float(os.getenv('PEER_READ_TIMEOUT', 10))
+OUTBOUND_QUEUE_SIZE = int(os.getenv('OUTBOUND_QUEUE_SIZE', 1000))  # Messages waiting per peer before new ones are dropped
+
+
+def peer_url(peer, path):
+    """
+    Build the URL of an endpoint of a peer.
+    """
+    return f"http://{peer['ip']}:{peer['port']}{path}"
+
+
+class Coalescer:
+
+    def __init__(self, flush, max_items: int, window: float):
+        """
+        Initialize a buffer that collects items and hands them on in batches.
+        A batch is flushed when it holds max_items items or window seconds after its first item arrived,
+        whichever comes first. Batches are flushed in order.
+
+        :param flush: Called with the list of items of every batch. Must not block for long.
+        :param max_items: The maximum number of items per batch.
+        :param window: The maximum seconds an item waits, 0 flushes every item immediately.
+        """
+        self.flush_callback = flush
+        self.max_items = max_items
+        self.window = window
+        self.items = []
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, item):
+        """
+        Add an item to the current batch.
+        """
+        with self.lock:
+            self.items.append(item)
+            if len(self.items) >= self.max_items or self.window <= 0:
+                self._flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """
+        Flush the current batch now, e.g. before a message that must not overtake it.
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        items, self.items = self.items, []
+        if items:
+            self.flush_callback(items)
+
+
+class PeerTransport:
+
+    def __init__(self, pool_size: int = PEER_POOL_SIZE, connect_timeout: float = PEER_CONNECT_TIMEOUT,
+                 read_timeout: float = PEER_READ_TIMEOUT):
+        """
+        Initialize the HTTP transport used for all requests to peers.
+        Every peer gets its own requests.Session with a pool of keep-alive connections, so consecutive
+        messages to a peer reuse an open TCP connection instead of paying a new handshake each time.
+        Broadcasts are queued to an outbound worker thread per peer (send()), so the caller returns at once,
+        peers receive in parallel and a slow peer only delays its own queue. Messages to a peer keep their order.
+
+        :param pool_size: The maximum number of idle connections kept open per peer. Concurrent requests
+                          beyond it still succeed on extra connections that are closed afterwards.
+        :param connect_timeout: Seconds to wait for a connection to a peer.
+        :param read_timeout: Seconds to wait for the response of a peer.
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.sessions = {}  # {(ip, port): (Session, HTTPAdapter)}
+        self.stats = {}     # {(ip, port): {'requests', 'errors', 'seconds', 'sent', 'dropped', 'queued_seconds'}}
+        self.outboxes = {}  # {(ip, port): Queue of (peer, path, data, description, headers, enqueue time)}
+        self.lock = threading.Lock()
+
+    def session(self, peer):
+        """
+        Returns the session of a peer, creating it on first use.
+
+        :param peer: The ring entry (or any dict with 'ip' and 'port') of the peer.
+        :return: A ((ip, port), Session) tuple.
+        """
+        key = (peer['ip'], int(peer['port']))
+        with self.lock:
+            entry = self.sessions.get(key)
+            if entry is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                entry = self.sessions[key] = (session, adapter)
+                self.stats[key] = {'requests': 0, 'errors': 0, 'seconds': 0.0,
+                                   'sent': 0, 'dropped': 0, 'queued_seconds': 0.0}
+        return key, entry[0]
+
+    def request(self, method: str, peer, path: str, timeout=None, **kwargs):
+        """
+        Send a request to a peer over its pooled session.
+
+        :param method: The HTTP method.
+        :param peer: The ring entry of the peer.
+        :param path: The endpoint path, e.g. '/blocks/receive'.
+        :param timeout: Overrides the default (connect, read) timeout.
+        :param kwargs: Passed on to requests (data, params, ...).
+        :return: The Response. Raises requests.exceptions.RequestException on network errors.
+        """
+        key, session = self.session(peer)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return session.request(method, peer_url(peer, path), timeout=timeout or self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                stats = self.stats[key]
+                stats['requests'] += 1
+                stats['errors'] += failed
+                stats['seconds'] += elapsed
+
+    def get(self, peer, path: str, **kwargs):
+        return self.request('GET', peer, path, **kwargs)
+
+    def post(self, peer, path: str, **kwargs):
+        return self.request('POST', peer, path, **kwargs)
+
+    def send(self, peer, path: str, data: bytes, description: str = 'message', headers=None):
+        """
+        Queue a POST to a peer and return immediately. The message is sent by the outbound worker of the peer.
+        If OUTBOUND_QUEUE_SIZE messages are already waiting, the message is dropped.
+
+        :param peer: The ring entry of the peer.
+        :param path: The endpoint path.
+        :param data: The request body.
+        :param description: What is sent, for error messages.
+        :param headers: Optional request headers.
+        """
+        key, _ = self.session(peer)
+        with self.lock:
+            outbox = self.outboxes.get(key)
+            if outbox is None:
+                outbox = self.outboxes[key] = queue.Queue(OUTBOUND_QUEUE_SIZE)
+                threading.Thread(target=self._deliver, args=(key, outbox), name=f"Outbound-{key[0]}:{key[1]}",
+                                 daemon=True).start()
+        try:
+            outbox.put_nowait((peer, path, data, description, headers, time.perf_counter()))
+        except queue.Full:
+            Logger.error(f"Outbound queue of Node {peer.get('id', '?')} is full, dropping {description}")
+            with self.lock:
+                self.stats[key]['dropped'] += 1
+
+    def _deliver(self, key, outbox):
+        """
+        Outbound worker of a peer: sends its queued messages in order.
+        """
+        while True:
+            item = outbox.get()
+            if item is None:
+                return
+            peer, path, data, description, headers, queued = item
+            waited = time.perf_counter() - queued
+            try:
+                self.post(peer, path, data=data, headers=headers)
+            except requests.exceptions.RequestException:
+                Logger.error(f"Network Error: Could not send {description} to Node {peer.get('id', '?')}")
+            with self.lock:
+                stats = self.stats[key]
+                stats['sent'] += 1
+                stats['queued_seconds'] += waited
+
+    def metrics(self):
+        """
+        Returns the connection reuse and outbound queue statistics of every peer.
+        A request that did not open a new connection reused a pooled one.
+
+        :return: A list of dictionaries, one per peer.
+        """
+        with self.lock:
+            entries = [(key, adapter, dict(self.stats[key]), self.outboxes.get(key))
+                       for key, (_, adapter) in self.sessions.items()]
+
+        metrics = []
+        for (ip, port), adapter, stats, outbox in entries:
+            pools = adapter.poolmanager.pools
+            connections = sum(pools[pool_key].num_connections for pool_key in pools.keys() if pool_key in pools)
+            reused = max(0, stats['requests'] - stats['errors'] - connections)
+            metrics.append({
+                'peer': f"{ip}:{port}",
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'connections_opened': connections,
+                'connections_reused': reused,
+                'reuse_ratio': round(reused / stats['requests'], 3) if stats['requests'] else 0.0,
+                'avg_latency_ms': round(1000 * stats['seconds'] / stats['requests'], 3) if stats['requests'] else 0.0,
+                'queue_depth': outbox.qsize() if outbox is not None else 0,
+                'queued_sent': stats['sent'],
+                'queued_dropped': stats['dropped'],
+                'avg_queue_wait_ms': round(1000 * stats['queued_seconds'] / stats['sent'], 3) if stats['sent'] else 0.0
+            })
+        return metrics
+
+    def close(self):
+        """
+        Stop the outbound workers once their queues are drained and close all pooled connections.
+        """
+        with self.lock:
+            outboxes, self.outboxes = self.outboxes, {}
+        for outbox in outboxes.values():
+            outbox.put(None)
+        with self.lock:
+            sessions, self.sessions = self.sessions, {}
+        for session, _ in sessions.values():
+            session.close()
@@ -1,13 +1,301 @@
+from array import array
+
+
 class UTXO:
+    __slots__ = ('transaction_id', 'index', 'owner', 'amount')
 
-    def __init__(self, sender, receiver, amount):
+    def __init__(self, transaction_id, index, owner, amount):
         """
         Initialize a new UTXO (Unspent Transaction Output)
 
-        :param sender: The address of the sender
-        :param receiver: The address of the receiver
+        :param transaction_id: The ID of the transaction that created the output
+        :param index: The position of the output in that transaction (0: receiver, 1: change)
+        :param owner: The node ID owning the output
         :param amount: The amount of currency transferred
         """
-        self.sender = sender
-        self.receiver = receiver
+        self.transaction_id = transaction_id
+        self.index = index
+        self.owner = owner
         self.amount = amount
+
+    @property
+    def outpoint(self):
+        """
+        The key identifying this output: the 32-byte transaction ID followed by the output index byte.
+        """
+        return self.transaction_id + bytes((self.index,))
+
+
+class UTXOState:
+    """
+    Common operations of the committed UTXOSet and its UTXOView overlays.
+    Subclasses implement get, owner_outpoints, add, spend and balance.
+    """
+
+    def select(self, owner, amount):
+        """
+        Select the oldest outputs of an owner until they cover the amount.
+
+        :param owner: The node ID.
+        :param amount: The amount to cover.
+        :return: A (list of outpoints, accumulated amount) tuple.
+        """
+        selected = []
+        accumulated = 0
+        for outpoint in self.owner_outpoints(owner):
+            if accumulated >= amount:
+                break
+            selected.append(outpoint)
+            accumulated += self.get(outpoint).amount
+        return selected, accumulated
+
+    def apply_transaction(self, tx, sender, receiver):
+        """
+        Spend the sender's outputs for a transaction and create the receiver output and the sender's change.
+
+        :param tx: The Transaction.
+        :param sender: The node ID of the sender.
+        :param receiver: The node ID of the receiver.
+        :return: True if the transaction was applied, False if the sender has insufficient funds
+                 or the transaction was already applied.
+        """
+        # The receiver output always exists once a transaction is applied
+        if self.get(tx.transaction_id + b'\x00') is not None:
+            return False
+
+        selected, accumulated = self.select(sender, tx.amount)
+        if accumulated < tx.amount:
+            return False
+
+        for outpoint in selected:
+            self.spend(outpoint)
+
+        self.add(UTXO(tx.transaction_id, 0, receiver, tx.amount))
+        if accumulated > tx.amount:
+            self.add(UTXO(tx.transaction_id, 1, sender, accumulated - tx.amount))
+        return True
+
+    def overlay(self):
+        """
+        Create a copy-on-write view on top of this state.
+
+        :return: A new UTXOView.
+        """
+        return UTXOView(self)
+
+
+class UTXOSet(UTXOState):
+
+    def __init__(self):
+        """
+        Initialize an empty UTXO index.
+        Outputs are keyed by outpoint and stored column-wise: the outpoint maps to a slot in typed arrays
+        of amounts and owners, and slots of spent outputs are reused. Every owner has an insertion-ordered
+        index of its outpoints and a running balance, so balance checks are O(1) and coin selection is
+        O(selected outputs). UTXO objects are only materialized by get() and spend().
+        """
+        self.slots = {}                 # {outpoint: slot}
+        self.amounts = array('d')       # Amount per slot
+        self.owner_ids = array('q')     # Owner (node ID) per slot
+        self.free = []                  # Slots of spent outputs, reused by add()
+        self.owners = {}                # {owner: {outpoint: None}}, oldest outputs first
+        self.balances = {}              # {owner: balance}
+
+    def get(self, outpoint):
+        """
+        Returns the unspent output with the given outpoint.
+
+        :param outpoint: The outpoint (transaction ID + output index byte) of the output.
+        :return: The UTXO, or None if it does not exist or is spent.
+        """
+        slot = self.slots.get(outpoint)
+        if slot is None:
+            return None
+        return UTXO(outpoint[:-1], outpoint[-1], self.owner_ids[slot], self.amounts[slot])
+
+    def owner_outpoints(self, owner):
+        """
+        Iterate the outpoints of an owner, oldest first.
+
+        :param owner: The node ID.
+        """
+        return iter(self.owners.get(owner, ()))
+
+    def add(self, utxo: UTXO):
+        """
+        Add an unspent output.
+
+        :param utxo: The UTXO to add.
+        :raises ValueError: If an unspent output with the same outpoint exists.
+        """
+        outpoint = utxo.outpoint
+        if outpoint in self.slots:
+            raise ValueError(f"Output {outpoint.hex()} already exists")
+
+        if self.free:
+            slot = self.free.pop()
+            self.amounts[slot] = utxo.amount
+            self.owner_ids[slot] = utxo.owner
+        else:
+            slot = len(self.amounts)
+            self.amounts.append(utxo.amount)
+            self.owner_ids.append(utxo.owner)
+
+        self.slots[outpoint] = slot
+        self.owners.setdefault(utxo.owner, {})[outpoint] = None
+        self.balances[utxo.owner] = self.balances.get(utxo.owner, 0) + utxo.amount
+
+    def spend(self, outpoint):
+        """
+        Remove an output from the set.
+
+        :param outpoint: The outpoint (transaction ID + output index byte) of the output.
+        :return: The spent UTXO.
+        """
+        utxo = self.get(outpoint)
+        self.free.append(self.slots.pop(outpoint))
+        del self.owners[utxo.owner][outpoint]
+        self.balances[utxo.owner] -= utxo.amount
+        return utxo
+
+    def balance(self, owner):
+        """
+        Returns the balance of an owner.
+
+        :param owner: The node ID.
+        :return: The sum of the owner's unspent outputs.
+        """
+        return self.balances.get(owner, 0)
+
+    def rollback(self, undo):
+        """
+        Revert the changes of a committed view: remove the outputs it created and restore the outputs it spent.
+
+        :param undo: The (spent UTXOs, created UTXOs) record returned by UTXOView.commit().
+        """
+        spent, created = undo
+        for utxo in reversed(created):
+            self.spend(utxo.outpoint)
+        for utxo in spent:
+            self.add(utxo)
+
+    def reapply(self, undo):
+        """
+        Redo the changes of a committed view from its undo record (used when replaying stored blocks).
+
+        :param undo: The (spent UTXOs, created UTXOs) record returned by UTXOView.commit().
+        """
+        spent, created = undo
+        for utxo in spent:
+            self.spend(utxo.outpoint)
+        for utxo in created:
+            self.add(utxo)
+
+    def __len__(self):
+        return len(self.slots)
+
+
+class UTXOView(UTXOState):
+
+    def __init__(self, base: UTXOState):
+        """
+        Initialize a copy-on-write overlay on top of a UTXO state.
+        Spends and creations are recorded in the overlay only; the base is not touched until commit().
+        Creating a view and applying a block costs O(transactions), independent of the size of the base.
+
+        :param base: The UTXOSet (or another UTXOView) below this view.
+        """
+        self.base = base
+        self.created = {}   # {outpoint: UTXO} created in this view
+        self.owners = {}    # {owner: {outpoint: None}} created in this view
+        self.spent = {}     # {outpoint: UTXO} spent outputs of the base
+        self.deltas = {}    # {owner: balance change}
+
+    def get(self, outpoint):
+        """
+        Returns the unspent output with the given outpoint as seen through this view.
+
+        :param outpoint: The outpoint (transaction ID + output index byte) of the output.
+        :return: The UTXO, or None if it does not exist or is spent.
+        """
+        utxo = self.created.get(outpoint)
+        if utxo is not None:
+            return utxo
+        if outpoint in self.spent:
+            return None
+        return self.base.get(outpoint)
+
+    def owner_outpoints(self, owner):
+        """
+        Iterate the outpoints of an owner, oldest (base) first, skipping outputs spent in this view.
+
+        :param owner: The node ID.
+        """
+        for outpoint in self.base.owner_outpoints(owner):
+            if outpoint not in self.spent:
+                yield outpoint
+        yield from list(self.owners.get(owner, ()))
+
+    def add(self, utxo: UTXO):
+        """
+        Record a new unspent output in this view.
+
+        :param utxo: The UTXO to add.
+        :raises ValueError: If an unspent output with the same outpoint exists in this view.
+        """
+        outpoint = utxo.outpoint
+        if self.get(outpoint) is not None:
+            raise ValueError(f"Output {outpoint.hex()} already exists")
+        self.created[outpoint] = utxo
+        self.owners.setdefault(utxo.owner, {})[outpoint] = None
+        self.deltas[utxo.owner] = self.deltas.get(utxo.owner, 0) + utxo.amount
+
+    def spend(self, outpoint):
+        """
+        Record the spending of an output in this view.
+
+        :param outpoint: The outpoint (transaction ID + output index byte) of the output.
+        :return: The spent UTXO.
+        """
+        utxo = self.created.pop(outpoint, None)
+        if utxo is not None:
+            del self.owners[utxo.owner][outpoint]
+        else:
+            utxo = self.base.get(outpoint)
+            if utxo is None or outpoint in self.spent:
+                raise KeyError(outpoint)
+            self.spent[outpoint] = utxo
+        self.deltas[utxo.owner] = self.deltas.get(utxo.owner, 0) - utxo.amount
+        return utxo
+
+    def balance(self, owner):
+        """
+        Returns the balance of an owner as seen through this view.
+
+        :param owner: The node ID.
+        :return: The sum of the owner's unspent outputs.
+        """
+        return self.base.balance(owner) + self.deltas.get(owner, 0)
+
+    def commit(self):
+        """
+        Apply the recorded spends and creations to the base, then reset this view.
+
+        :return: The undo record (spent UTXOs, created UTXOs) that reverts the commit with UTXOSet.rollback().
+        """
+        undo = (list(self.spent.values()), list(self.created.values()))
+        for outpoint in self.spent:
+            self.base.spend(outpoint)
+        for utxo in self.created.values():
+            self.base.add(utxo)
+        self.discard()
+        return undo
+
+    def discard(self):
+        """
+        Drop all recorded changes.
+        """
+        self.created = {}
+        self.owners = {}
+        self.spent = {}
+        self.deltas = {}
@@ -0,0 +1,118 @@
+from dotenv import load_dotenv
+import os
+
+from src.utils.logger import Logger
+
+load_dotenv()
+VALIDATION_PARALLEL_THRESHOLD = int(os.getenv('VALIDATION_PARALLEL_THRESHOLD', 16))  # Blocks hashed on the pool
+
+
+def parse_checkpoints(value: str):
+    """
+    Parse trusted checkpoints of the form "<height>:<block hash>,<height>:<block hash>".
+
+    :param value: The checkpoint list.
+    :return: A dictionary {height: block hash}.
+    """
+    checkpoints = {}
+    for entry in value.split(','):
+        if entry.strip():
+            height, block_hash = entry.strip().split(':')
+            checkpoints[int(height)] = block_hash.lower()
+    return checkpoints
+
+
+CHECKPOINTS = parse_checkpoints(os.getenv('CHECKPOINTS', ''))
+
+
+def _check_block_hash(block):
+    """
+    Recompute the hash of a block inside a pool worker.
+
+    :param block: The Block to check.
+    :return: True if the stored hash is valid and meets the target, False otherwise.
+    """
+    return block.has_valid_hash()
+
+
+class ChainValidator:
+
+    def __init__(self, verifier, checkpoints: dict):
+        """
+        Initialize the validation pipeline for blocks received from peers.
+        The stateless checks of a whole branch (recomputed block hashes and transaction signatures)
+        run in parallel on the process pool of the signature verifier; the stateful checks
+        (linkage, targets and UTXO transitions) are replayed in order by the node afterwards.
+
+        :param verifier: The SignatureVerifier whose process pool and cache are used.
+        :param checkpoints: Trusted {height: block hash} pairs. Signatures of blocks up to a matching
+                            checkpoint are not verified.
+        """
+        self.verifier = verifier
+        self.checkpoints = checkpoints
+
+    def trusted_length(self, start_height: int, blocks):
+        """
+        Returns how many leading blocks of a branch are covered by a checkpoint the branch contains.
+
+        :param start_height: The height of the first block.
+        :param blocks: The blocks of the branch, oldest first.
+        :return: The number of trusted blocks.
+        """
+        trusted = 0
+        for height, block_hash in self.checkpoints.items():
+            position = height - start_height
+            if 0 <= position < len(blocks) and blocks[position].hash == block_hash:
+                trusted = max(trusted, position + 1)
+        return trusted
+
+    def check_hashes(self, blocks):
+        """
+        Recompute the hashes of blocks, on the process pool if there are enough of them.
+
+        :param blocks: The blocks to check.
+        :return: A list of booleans, one per block.
+        """
+        workers = self.verifier.workers
+        if workers > 1 and len(blocks) >= VALIDATION_PARALLEL_THRESHOLD:
+            chunksize = max(1, len(blocks) // (workers * 4))
+            return list(self.verifier.get_executor().map(_check_block_hash, blocks, chunksize=chunksize))
+        return [block.has_valid_hash() for block in blocks]
+
+    def validate(self, start_height: int, blocks):
+        """
+        Run the stateless checks of a branch: checkpoints, block hashes and signatures.
+
+        :param start_height: The height of the first block.
+        :param blocks: The blocks of the branch, oldest first.
+        :return: The number of leading blocks that passed all checks.
+        """
+        # A block at a checkpoint height must be the checkpointed block
+        valid = len(blocks)
+        for position, block in enumerate(blocks):
+            expected = self.checkpoints.get(start_height + position)
+            if expected is not None and block.hash != expected:
+                Logger.error(f"Block at height {start_height + position} does not match the checkpoint")
+                valid = position
+                break
+
+        blocks = blocks[:valid]
+        trusted = self.trusted_length(start_height, blocks)
+        hashes = self.check_hashes(blocks)
+
+        # Signatures of all untrusted blocks are verified as one batch
+        transactions = [tx for block in blocks[trusted:] for tx in block.transactions_list]
+        signatures = self.verifier.verify_batch(transactions)
+
+        offset = 0
+        for position, block in enumerate(blocks):
+            if not hashes[position]:
+                Logger.error(f"Block at height {start_height + position} has an invalid hash")
+                return position
+            if position >= trusted:
+                size = len(block.transactions_list)
+                if not all(signatures[offset:offset + size]):
+                    Logger.error(f"Block at height {start_height + position} has an invalid transaction signature")
+                    return position
+                offset += size
+        return valid
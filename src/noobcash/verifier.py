@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import multiprocessing
+import threading
+
+from src.noobcash.transaction import Transaction
+
+
+def _verify_signature(public_key, payload, signature):
+    """
+    Verify a single signature inside a pool worker.
+
+    :param public_key: The PEM encoded public key of the sender.
+    :param payload: The signed payload bytes.
+    :param signature: The signature to check.
+    :return: True if the signature is valid, False otherwise.
+    """
+    return Transaction.verify_payload(public_key, payload, signature)
+
+
+def _content_digest(tx: Transaction):
+    """
+    Digest of the signed payload and signature, so a cached entry does not match a tampered transaction.
+
+    :param tx: The Transaction to digest.
+    :return: The SHA256 digest bytes.
+    """
+    return hashlib.sha256(tx.get_sign_payload() + (tx.signature or b'')).digest()
+
+
+class SignatureVerifier:
+
+    def __init__(self, get_ring, workers: int, cache_size: int, parallel_threshold: int):
+        """
+        Initialize the signature verification service.
+        Batches are verified concurrently on a process pool and verified transactions are remembered
+        in a bounded LRU cache, so every signature is checked once per node.
+
+        :param get_ring: Callable returning the current Ring, used to resolve sender addresses to public keys.
+        :param workers: The number of verification processes.
+        :param cache_size: The maximum number of verified transactions to remember.
+        :param parallel_threshold: The minimum number of uncached signatures for which the process pool is used.
+        """
+        self.get_ring = get_ring
+        self.workers = max(1, workers)
+        self.cache_size = cache_size
+        self.parallel_threshold = parallel_threshold
+        self.executor = None
+        self.verified = OrderedDict()  # {transaction_id: content digest}
+        self.lock = threading.Lock()
+
+    def is_verified(self, tx: Transaction):
+        """
+        Check if the transaction's signature has already been verified.
+
+        :param tx: The Transaction to check.
+        :return: True if a cached verification exists, False otherwise.
+        """
+        digest = _content_digest(tx)
+        with self.lock:
+            if self.verified.get(tx.transaction_id) != digest:
+                return False
+            self.verified.move_to_end(tx.transaction_id)
+            return True
+
+    def mark_verified(self, tx: Transaction):
+        """
+        Remember a transaction as verified, evicting the least recently used entry if the cache is full.
+
+        :param tx: The verified Transaction.
+        """
+        digest = _content_digest(tx)
+        with self.lock:
+            self.verified[tx.transaction_id] = digest
+            self.verified.move_to_end(tx.transaction_id)
+            while len(self.verified) > self.cache_size:
+                self.verified.popitem(last=False)
+
+    def verify(self, tx: Transaction):
+        """
+        Verify the signature of a single transaction, using the cache if possible.
+
+        :param tx: The Transaction to verify.
+        :return: True if the signature is valid, False otherwise.
+        """
+        return self.verify_batch([tx])[0]
+
+    def verify_batch(self, transactions):
+        """
+        Verify the signatures of a batch of transactions.
+        Cached transactions are skipped; the rest is verified on the process pool if the batch is large enough.
+
+        :param transactions: A list of Transaction objects.
+        :return: A list of booleans, one per transaction.
+        """
+        ring = self.get_ring()
+        results = [self.is_verified(tx) for tx in transactions]
+
+        # Transactions from unknown senders or with an ID not matching their content are invalid
+        pending = [
+            i for i, valid in enumerate(results)
+            if not valid and transactions[i].sender_address in ring and transactions[i].has_valid_id()
+        ]
+        if not pending:
+            return results
+
+        if self.workers > 1 and len(pending) >= self.parallel_threshold:
+            args = [
+                (ring[tx.sender_address]['public_key'], tx.get_sign_payload(), tx.signature)
+                for tx in (transactions[i] for i in pending)
+            ]
+            chunksize = max(1, len(args) // (self.workers * 4))
+            verified = list(self.get_executor().map(_verify_signature, *zip(*args), chunksize=chunksize))
+        else:
+            verified = [
+                transactions[i].verify_signature(ring.public_key(transactions[i].sender_address))
+                for i in pending
+            ]
+
+        for i, valid in zip(pending, verified):
+            results[i] = valid
+            if valid:
+                self.mark_verified(transactions[i])
+
+        return results
+
+    def get_executor(self):
+        """
+        Returns the process pool, creating it on first use.
+
+        :return: The ProcessPoolExecutor instance.
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.executor
@@ -1,18 +1,32 @@
-from Crypto.PublicKey import RSA
+from collections import deque
+from dotenv import load_dotenv
+import os
+
+from src.noobcash.ring import fingerprint
+from src.noobcash.signatures import get_scheme
+
+load_dotenv()
+WALLET_HISTORY_SIZE = int(os.getenv('WALLET_HISTORY_SIZE', 1000))
 
 
 class Wallet:
 
-    def __init__(self):
+    def __init__(self, private_key_pem=None):
         """
         Initialize a new wallet.
-        Generates a new RSA key pair (private and public key).
-        Sets the address as the exported public key.
-        Initializes an empty list of transactions.
+        Generates a new key pair (private and public key) with the configured signature scheme,
+        or restores the key pair of a persisted wallet.
+        Sets the address as the short fingerprint of the exported public key.
+        Keeps the most recent WALLET_HISTORY_SIZE transactions; the full history is served by the chain index.
+
+
+        :param private_key_pem: The PEM encoded private key of a persisted wallet (optional).
 	    """
-        key = RSA.generate(2048)
+        scheme = get_scheme()
+        key = scheme.generate() if private_key_pem is None else scheme.import_private_key(private_key_pem)
 
-        self.private_key = key                              # Private key
-        self.public_key = key.publickey()                   # Public key
-        self.address = key.publickey().exportKey().decode() # Wallet address (public key in string format)
-        self.transactions = []                              # List of transactions associated with this wallet
\ No newline at end of file
+        self.private_key = key                                          # Private key
+        self.public_key_pem = scheme.export_public_key(key)             # Public key in string format
+        self.public_key = scheme.import_public_key(self.public_key_pem) # Public key
+        self.address = fingerprint(self.public_key_pem)                 # Wallet address (public key fingerprint)
+        self.transactions = deque(maxlen=WALLET_HISTORY_SIZE)           # Recent transactions associated with this wallet
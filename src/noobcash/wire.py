@@ -0,0 +1,288 @@
+import hashlib
+import struct
+
+from src.noobcash.block import Block, HEADER_NONCE, HEADER_PREFIX, HEADER_VERSION
+from src.noobcash.ring import Ring
+from src.noobcash.transaction import AMOUNT, NONCE_SIZE, Transaction
+from src.noobcash.utxo import UTXO
+
+WIRE_VERSION = 1
+MESSAGE_HEADER = struct.Struct('<BB')    # Wire version, message type
+COUNT = struct.Struct('<I')
+LENGTH = struct.Struct('<H')
+BLOCK_FLAGS = struct.Struct('<B')        # Bit 0: integer previous hash (genesis block)
+HEADER_SIZE = HEADER_PREFIX.size + HEADER_NONCE.size
+RING_ENTRY = struct.Struct('<HHd')       # Node id, port, balance | ip, public key
+UTXO_RECORD = struct.Struct('<32sBid')   # Transaction ID, output index, owner, amount
+SHORT_ID_SIZE = 8                        # Leading bytes of a transaction ID in compact blocks
+
+# Message types
+TRANSACTION = 1
+TRANSACTIONS = 2
+BLOCK = 3
+BLOCKS = 4
+RING = 5
+CHAIN = 6
+COMPACT_BLOCK = 7
+
+GENESIS_FLAG = 1
+
+
+class WireError(ValueError):
+    """
+    Raised when a message is truncated, malformed or of an unsupported version or type.
+    """
+
+
+def _string(value):
+    data = str(value).encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+def _read_string(view, offset):
+    (size,) = LENGTH.unpack_from(view, offset)
+    offset += LENGTH.size
+    return str(view[offset:offset + size], 'utf-8'), offset + size
+
+
+# Readers take a memoryview of the whole message and an offset, and return (value, next offset).
+# Slicing a memoryview does not copy; only the final values (strings, hashes, signatures) are copied out.
+# A truncated field moves the offset past the end, which decode() reports.
+
+def _write_transaction(parts, tx: Transaction):
+    # The signed payload is already a length-prefixed encoding of all fields except the signature
+    signature = tx.signature or b''
+    parts.append(tx.get_sign_payload())
+    parts.append(LENGTH.pack(len(signature)))
+    parts.append(signature)
+
+
+def _read_transaction(view, offset, unpack_length=LENGTH.unpack_from, unpack_amount=AMOUNT.unpack_from):
+    # Hot path of block and batch decoding: the string reads are inlined
+    start = offset
+    tx = Transaction.__new__(Transaction)
+    (size,) = unpack_length(view, offset)
+    offset += 2
+    tx.sender_address = str(view[offset:offset + size], 'utf-8')
+    offset += size
+    (size,) = unpack_length(view, offset)
+    offset += 2
+    tx.receiver_address = str(view[offset:offset + size], 'utf-8')
+    offset += size
+    (tx.amount,) = unpack_amount(view, offset)
+    offset += 8
+    tx.nonce = bytes(view[offset:offset + NONCE_SIZE])
+    offset += NONCE_SIZE
+    # The ID is the hash of the signed payload, so it is derived instead of transferred
+    tx.transaction_id = hashlib.sha256(view[start:offset]).digest()
+    (size,) = unpack_length(view, offset)
+    offset += 2
+    tx.signature = bytes(view[offset:offset + size]) if size else None
+    return tx, offset + size
+
+
+def _write_transactions(parts, transactions):
+    parts.append(COUNT.pack(len(transactions)))
+    for tx in transactions:
+        _write_transaction(parts, tx)
+
+
+def _read_transactions(view, offset):
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    transactions = []
+    for _ in range(count):
+        tx, offset = _read_transaction(view, offset)
+        transactions.append(tx)
+    return transactions, offset
+
+
+def _write_header(parts, block: Block):
+    parts.append(BLOCK_FLAGS.pack(GENESIS_FLAG if isinstance(block.previous_hash, int) else 0))
+    parts.append(block.serialize_header())
+
+
+def _read_header(view, offset):
+    (flags,) = BLOCK_FLAGS.unpack_from(view, offset)
+    offset += BLOCK_FLAGS.size
+    header = view[offset:offset + HEADER_SIZE]
+    version, previous_hash, merkle_root, target, timestamp = HEADER_PREFIX.unpack_from(header)
+    if version != HEADER_VERSION:
+        raise WireError(f"Unsupported block header version {version}")
+
+    block = Block.__new__(Block)
+    block.previous_hash = int.from_bytes(previous_hash, 'big') if flags & GENESIS_FLAG else previous_hash.hex()
+    block.merkle_root = merkle_root
+    block.target = int.from_bytes(target, 'big')
+    block.timestamp = timestamp
+    (block.nonce,) = HEADER_NONCE.unpack_from(header, HEADER_PREFIX.size)
+    # The hash commits to the received header; has_valid_hash() later checks it against the transactions
+    block.hash = hashlib.sha256(header).hexdigest()
+    block.transactions_list = []
+    return block, offset + HEADER_SIZE
+
+
+def _write_block(parts, block: Block):
+    _write_header(parts, block)
+    _write_transactions(parts, block.transactions_list)
+
+
+def _read_block(view, offset):
+    block, offset = _read_header(view, offset)
+    block.transactions_list, offset = _read_transactions(view, offset)
+    return block, offset
+
+
+def _write_compact_block(parts, block: Block):
+    # The header and the short IDs of the transactions, which the receiver looks up in its pending pool
+    _write_header(parts, block)
+    parts.append(COUNT.pack(len(block.transactions_list)))
+    parts.extend(tx.transaction_id[:SHORT_ID_SIZE] for tx in block.transactions_list)
+
+
+def _read_compact_block(view, offset):
+    block, offset = _read_header(view, offset)
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    end = offset + count * SHORT_ID_SIZE
+    if end > len(view):
+        raise WireError("Truncated message")
+    short_ids = [bytes(view[position:position + SHORT_ID_SIZE]) for position in range(offset, end, SHORT_ID_SIZE)]
+    return (block, short_ids), end
+
+
+def _write_blocks(parts, blocks):
+    parts.append(COUNT.pack(len(blocks)))
+    for block in blocks:
+        _write_block(parts, block)
+
+
+def _read_blocks(view, offset):
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    blocks = []
+    for _ in range(count):
+        block, offset = _read_block(view, offset)
+        blocks.append(block)
+    return blocks, offset
+
+
+def _write_ring(parts, ring: Ring):
+    entries = ring.values()
+    parts.append(COUNT.pack(len(entries)))
+    for entry in entries:
+        parts.append(RING_ENTRY.pack(entry['id'], int(entry['port']), entry['balance']))
+        parts.append(_string(entry['ip']))
+        parts.append(_string(entry['public_key']))
+
+
+def _read_ring(view, offset):
+    ring = Ring()
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        id, port, balance = RING_ENTRY.unpack_from(view, offset)
+        ip, offset = _read_string(view, offset + RING_ENTRY.size)
+        public_key, offset = _read_string(view, offset)
+        ring.add(id, ip, str(port), public_key, balance)
+    return ring, offset
+
+
+def _write_utxos(parts, utxos):
+    parts.append(COUNT.pack(len(utxos)))
+    for utxo in utxos:
+        parts.append(UTXO_RECORD.pack(utxo.transaction_id, utxo.index, utxo.owner, utxo.amount))
+
+
+def _read_utxos(view, offset):
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    end = offset + count * UTXO_RECORD.size
+    return [UTXO(*record) for record in UTXO_RECORD.iter_unpack(view[offset:end])], end
+
+
+def _write_chain(parts, blockchain):
+    # Every block travels with its undo record, so the receiver rebuilds the UTXO set without revalidating
+    parts.append(COUNT.pack(len(blockchain.chain)))
+    for block, (spent, created) in zip(blockchain.chain, blockchain.undo_logs):
+        _write_block(parts, block)
+        _write_utxos(parts, spent)
+        _write_utxos(parts, created)
+
+
+def _read_chain(view, offset):
+    (count,) = COUNT.unpack_from(view, offset)
+    offset += COUNT.size
+    blocks, undo_logs = [], []
+    for _ in range(count):
+        block, offset = _read_block(view, offset)
+        spent, offset = _read_utxos(view, offset)
+        created, offset = _read_utxos(view, offset)
+        blocks.append(block)
+        undo_logs.append((spent, created))
+    return (blocks, undo_logs), offset
+
+
+_WRITERS = {
+    TRANSACTION: _write_transaction,
+    TRANSACTIONS: _write_transactions,
+    BLOCK: _write_block,
+    BLOCKS: _write_blocks,
+    RING: _write_ring,
+    CHAIN: _write_chain,
+    COMPACT_BLOCK: _write_compact_block
+}
+
+_READERS = {
+    TRANSACTION: _read_transaction,
+    TRANSACTIONS: _read_transactions,
+    BLOCK: _read_block,
+    BLOCKS: _read_blocks,
+    RING: _read_ring,
+    CHAIN: _read_chain,
+    COMPACT_BLOCK: _read_compact_block
+}
+
+
+def encode(message_type: int, payload):
+    """
+    Encode a message in the binary wire format: a version byte, a message type byte and the fields of
+    the payload, fixed-size or length-prefixed, in little-endian order.
+
+    :param message_type: One of TRANSACTION, TRANSACTIONS, BLOCK, BLOCKS, RING, CHAIN or COMPACT_BLOCK.
+    :param payload: A Transaction, a list of Transactions, a Block, a list of Blocks, a Ring or a Blockchain
+                    (a Block for COMPACT_BLOCK).
+    :return: The message bytes.
+    """
+    parts = [MESSAGE_HEADER.pack(WIRE_VERSION, message_type)]
+    _WRITERS[message_type](parts, payload)
+    return b''.join(parts)
+
+
+def decode(data, message_type: int):
+    """
+    Decode a message received from a peer.
+    Fields are read in place from a memoryview of the buffer, and unlike unpickling, decoding never
+    constructs anything but the expected message objects.
+
+    :param data: The message bytes (or any buffer, e.g. the request body).
+    :param message_type: The expected message type.
+    :return: The payload (for CHAIN, a (blocks, undo records) tuple; for COMPACT_BLOCK, a
+             (block without transactions, short transaction IDs) tuple).
+    :raises WireError: If the message is malformed or of another version or type.
+    """
+    view = memoryview(data)
+    try:
+        version, received_type = MESSAGE_HEADER.unpack_from(view)
+        if version != WIRE_VERSION:
+            raise WireError(f"Unsupported wire version {version}")
+        if received_type != message_type:
+            raise WireError(f"Expected message type {message_type}, got {received_type}")
+        payload, offset = _READERS[message_type](view, MESSAGE_HEADER.size)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise WireError(f"Malformed message: {e}") from e
+    if offset > len(view):
+        raise WireError("Truncated message")
+    if offset < len(view):
+        raise WireError("Trailing bytes after message")
+    return payload